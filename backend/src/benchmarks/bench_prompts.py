@@ -0,0 +1,121 @@
+"""Per-call cost of building LLM prompts: inline f-strings vs the prompt registry.
+
+The "inline" side compiles each template back into the f-string the call
+sites used before (re-serializing the resume schema on every call), so both
+sides produce identical messages. Run from backend/src:
+
+    python benchmarks/bench_prompts.py [--iterations 20000]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SRC_DIR)
+# Settings are imported with shared.llm; no service is contacted
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "GROQ_API_KEY"):
+    os.environ.setdefault(name, "benchmark")
+
+
+def load_prompts(module_dir):
+    """Import a module's prompts.py without its package (which builds routers and clients)"""
+    path = os.path.join(SRC_DIR, "modules", module_dir, "prompts.py")
+    spec = importlib.util.spec_from_file_location(f"{module_dir}_prompts", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+resume_prompts = load_prompts("resume")
+roadmap_prompts = load_prompts("roadmap")
+RESUME_SCHEMA, RESUME_STRUCTURE = resume_prompts.RESUME_SCHEMA, resume_prompts.RESUME_STRUCTURE
+ROADMAP_GENERATE, TECHSTACK_RERANK = roadmap_prompts.ROADMAP_GENERATE, roadmap_prompts.TECHSTACK_RERANK
+
+RESUME_TEXT = "Jane Doe\nSenior Engineer at Acme (2019-2025)\nPython, Kubernetes, React\n" * 40
+
+
+def inline_builder(template, field_expressions=None):
+    """The pre-registry call site: an f-string evaluated (and messages built) per call"""
+    source = template.template
+    for field, expression in (field_expressions or {}).items():
+        source = source.replace("{" + field + "}", "{" + expression + "}")
+    code = compile('f"""' + source + '"""', template.name, "eval")
+    system = template.system
+
+    def build(**values):
+        prompt = eval(code, {"json": json, "schema": RESUME_SCHEMA}, values)
+        if system:
+            return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+        return [{"role": "user", "content": prompt}]
+    return build
+
+
+CASES = [
+    (
+        RESUME_STRUCTURE,
+        inline_builder(RESUME_STRUCTURE, {"schema": "json.dumps(schema, indent=2)"}),
+        {"text": RESUME_TEXT}
+    ),
+    (
+        ROADMAP_GENERATE,
+        inline_builder(ROADMAP_GENERATE),
+        {"tech_stack": "React", "duration_days": 30, "skill_level": "beginner",
+         "user_skills_context": "\nUser already knows: JavaScript, HTML, CSS"}
+    ),
+    (
+        TECHSTACK_RERANK,
+        inline_builder(TECHSTACK_RERANK),
+        {"interests": "web development, cloud", "user_skills_str": "Python",
+         "web_context": "Latest frameworks and tools " * 20,
+         "candidates": json.dumps(["React", "Vue", "Svelte", "Kubernetes", "Terraform"])}
+    ),
+]
+
+
+def peak_per_call(build, values, calls=200):
+    """Average tracemalloc peak of one call: its result plus any temporaries"""
+    tracemalloc.start()
+    total = 0
+    for _ in range(calls):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = build(**values)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+        del result
+    tracemalloc.stop()
+    return total / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'prompt':<20} {'version':<18} {'tokens':>7} {'inline us':>10} {'registry us':>12} {'speedup':>8} "
+          f"{'inline peak KB':>15} {'registry peak KB':>17}")
+    for template, inline, values in CASES:
+        registry = template.messages
+        # Same messages either way, so the comparison is like for like
+        assert inline(**values) == registry(**values), f"{template.name}: outputs differ"
+
+        timings = {}
+        for label, build in (("inline", inline), ("registry", registry)):
+            best = min(timeit.repeat(lambda: build(**values), number=args.iterations, repeat=5))
+            timings[label] = best / args.iterations * 1e6
+        memory = {
+            label: peak_per_call(build, values) / 1024
+            for label, build in (("inline", inline), ("registry", registry))
+        }
+        print(f"{template.name:<20} {template.version_hash:<18} {template.estimate_prompt_tokens(**values):>7} "
+              f"{timings['inline']:>10.2f} {timings['registry']:>12.2f} "
+              f"{timings['inline'] / timings['registry']:>7.1f}x "
+              f"{memory['inline']:>15.1f} {memory['registry']:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
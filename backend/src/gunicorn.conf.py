@@ -0,0 +1,16 @@
+# Production server config: gunicorn -c gunicorn.conf.py main:app
+#
+# Unlike `SERVER_MODE=production python main.py`, gunicorn preloads the app
+# once in the master and forks workers from it.
+from shared.config.settings import settings, use_shared_state
+
+# Must run before the app is preloaded so every worker shares the same
+# host-local cache and admission store
+use_shared_state()
+
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+workers = settings.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = settings.GRACEFUL_SHUTDOWN_TIMEOUT
+timeout = 120  # LLM calls can legitimately take a while
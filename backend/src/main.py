@@ -1,8 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from shared.config.settings import settings
+from shared.config.settings import settings, use_shared_state
+from shared.middleware import add_compression_middleware, get_admission_controller
+from shared.utils import FastJSONResponse
+from shared.cache import cache_stats
+from shared.events import get_event_bus, get_broadcaster
+from shared.llm import get_llm_policy, get_prompt_registry
+from shared.profiling import ProfilingMiddleware, router as profiling_router
 from modules.resume.routes import router as resume_router
-from modules.roadmap.routes import router as roadmap_router
+from modules.roadmap.routes import router as roadmap_router, prefetcher
+from modules.analytics.routes import router as analytics_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background consumer for deferred domain events (e.g. skill propagation)
+    await get_event_bus().start()
+    # Fan-out of live update deltas to SSE clients
+    await get_broadcaster().start()
+    yield
+    await get_broadcaster().stop()
+    await get_event_bus().stop(timeout=settings.GRACEFUL_SHUTDOWN_TIMEOUT)
 
 # Create single unified FastAPI application
 app = FastAPI(
@@ -10,7 +28,9 @@ app = FastAPI(
     description="Unified API for Resume Parsing and Learning Roadmap Generation",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -20,11 +40,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Profile-Ids"],
 )
 
+# Response compression (gzip/brotli above a size threshold)
+add_compression_middleware(app)
+
+# Opt-in profiling; nothing is installed (or wrapped) unless enabled
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiling_router, prefix="/debug", tags=["Debug"])
+
 # Register module routes with prefixes
 app.include_router(resume_router, prefix="/api/resume", tags=["Resume"])
 app.include_router(roadmap_router, prefix="/api/roadmap", tags=["Roadmap"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["Analytics"])
 
 @app.get("/")
 async def root():
@@ -39,11 +69,51 @@ async def root():
 async def health():
     return {"status": "healthy", "version": "2.0.0"}
 
+@app.get("/metrics/admission")
+async def admission_metrics():
+    return await get_admission_controller().stats()
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    return cache_stats()
+
+@app.get("/metrics/prefetch")
+async def prefetch_metrics():
+    return prefetcher.metrics()
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    return {
+        **get_llm_policy(settings.GROQ_API_KEY).metrics(),
+        "prompts": get_prompt_registry().describe()
+    }
+
+@app.get("/metrics/events")
+async def event_metrics():
+    return get_event_bus().stats
+
+@app.get("/metrics/broadcast")
+async def broadcast_metrics():
+    return get_broadcaster().metrics()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host=settings.API_HOST,
-        port=settings.API_PORT,
-        reload=True
-    )
+    if settings.SERVER_MODE == "production":
+        # Workers are spawned fresh; share caches/limits through one SQLite file
+        use_shared_state()
+        uvicorn.run(
+            "main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            workers=settings.WORKERS,
+            timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+            proxy_headers=True,
+            reload=False
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            reload=True
+        )
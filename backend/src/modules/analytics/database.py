@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional
+from shared.database import get_db
+from modules.roadmap.services.roadmap_index import normalize_stack_name
+
+class SkillAnalyticsDB:
+    """Reads the trigger-maintained skill counters (see skill-analytics.sql).
+
+    Every query hits `skill_counts`, `skill_category_counts` or `resume_skills`
+    by index; resume JSONB is never scanned here.
+    """
+
+    def __init__(self):
+        self.client = get_db()
+
+    def total_candidates(self) -> int:
+        """Users with a resume (one latest resume each)"""
+        result = self.client.table("resumes")\
+            .select("id", count="exact", head=True)\
+            .eq("is_latest", True)\
+            .execute()
+        return result.count or 0
+
+    def top_skills(
+        self,
+        k: int,
+        category: Optional[str] = None,
+        prefix: Optional[str] = None,
+        min_count: int = 1
+    ) -> List[Dict]:
+        """Most common skills, optionally within one resume category or by name prefix"""
+        table = "skill_category_counts" if category else "skill_counts"
+        query = self.client.table(table).select("skill, display_name, candidate_count")
+        if category:
+            query = query.eq("category", category.strip().lower())
+        if prefix:
+            # Normalized names only contain [a-z0-9+# ], so no LIKE escaping is needed
+            query = query.like("skill", f"{normalize_stack_name(prefix)}%")
+        if min_count > 1:
+            query = query.gte("candidate_count", min_count)
+        result = query.order("candidate_count", desc=True).order("skill").limit(k).execute()
+        return result.data
+
+    def skill_counts(self, skills: List[str]) -> Dict[str, int]:
+        """Candidate count per normalized skill name (missing skills are 0)"""
+        names = list({normalize_stack_name(s) for s in skills if normalize_stack_name(s)})
+        if not names:
+            return {}
+        result = self.client.table("skill_counts")\
+            .select("skill, candidate_count")\
+            .in_("skill", names)\
+            .execute()
+        counts = {name: 0 for name in names}
+        counts.update({row["skill"]: row["candidate_count"] for row in result.data})
+        return counts
+
+    def skill_group_counts(self, groups: Dict[str, List[str]]) -> Dict[str, int]:
+        """Candidates knowing any name of each group, e.g. {"Kubernetes": ["Kubernetes", "K8s"]}.
+
+        A candidate listing several names of one group counts once.
+        """
+        normalized = {
+            key: sorted({normalize_stack_name(n) for n in names if normalize_stack_name(n)})
+            for key, names in groups.items()
+        }
+        counts = {key: 0 for key in groups}
+        result = self.client.rpc("count_skill_groups", {"p_groups": normalized}).execute()
+        counts.update({row["name"]: row["candidate_count"] or 0 for row in result.data})
+        return counts
+
+    def skill_breakdown(self, skill: str) -> Optional[Dict]:
+        """Candidates knowing one skill, overall and per resume category"""
+        name = normalize_stack_name(skill)
+        overall = self.client.table("skill_counts")\
+            .select("skill, display_name, candidate_count")\
+            .eq("skill", name)\
+            .execute()
+        if not overall.data:
+            return None
+        categories = self.client.table("skill_category_counts")\
+            .select("category, candidate_count")\
+            .eq("skill", name)\
+            .execute()
+        return {
+            **overall.data[0],
+            "categories": {row["category"]: row["candidate_count"] for row in categories.data},
+        }
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from .database import SkillAnalyticsDB
+from .services import SkillGapAnalyzer
+from modules.roadmap.routes import roadmap_gen
+
+router = APIRouter()
+
+# Initialize services
+db = SkillAnalyticsDB()
+# Share the roadmap generator's catalog rather than loading a second copy
+gap_analyzer = SkillGapAnalyzer(db, roadmap_gen.catalog)
+
+@router.get("/skills/top")
+async def top_skills(
+    k: int = Query(20, ge=1, le=200),
+    category: Optional[str] = None,
+    prefix: Optional[str] = None,
+    min_count: int = Query(1, ge=1)
+):
+    """Most common skills across candidates' latest resumes
+    
+    `category` limits to one resume skill group (technical, tools, domain,
+    soft); `prefix` matches the start of the normalized skill name.
+    """
+    try:
+        skills = db.top_skills(k, category, prefix, min_count)
+        return {"skills": skills, "total_candidates": db.total_candidates()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# `path` so names containing "/" (CI/CD, PL/SQL, TCP/IP) reach the handler
+@router.get("/skills/{skill:path}")
+async def skill_count(skill: str):
+    """How many candidates list a skill, overall and per category"""
+    try:
+        breakdown = db.skill_breakdown(skill)
+        total = db.total_candidates()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if breakdown is None:
+        raise HTTPException(status_code=404, detail="No candidates list this skill")
+    return {
+        **breakdown,
+        "total_candidates": total,
+        "share": round(breakdown["candidate_count"] / total, 3) if total else 0.0
+    }
+
+@router.get("/skill-gaps")
+async def skill_gaps(
+    k: int = Query(10, ge=1, le=100),
+    interests: Optional[str] = None,
+    category: Optional[str] = None
+):
+    """Catalog tech stacks the fewest candidates know
+    
+    With `interests` (comma-separated) only the stacks the suggestion
+    endpoint would rank highly for them are compared.
+    """
+    try:
+        interest_list = [i.strip() for i in interests.split(",") if i.strip()] if interests else None
+        return gap_analyzer.skill_gaps(k, interest_list, category)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,3 @@
+from .skill_gaps import SkillGapAnalyzer
+
+__all__ = ['SkillGapAnalyzer']
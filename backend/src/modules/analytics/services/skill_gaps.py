@@ -0,0 +1,47 @@
+from typing import Dict, List, Optional
+from modules.roadmap.services.tech_catalog import TechCatalog
+from ..database import SkillAnalyticsDB
+
+class SkillGapAnalyzer:
+    """Compares catalog tech stacks against the skills candidates already have"""
+
+    def __init__(self, db: SkillAnalyticsDB, catalog: Optional[TechCatalog] = None):
+        self.db = db
+        self.catalog = catalog or TechCatalog()
+
+    def skill_gaps(
+        self,
+        k: int,
+        interests: Optional[List[str]] = None,
+        category: Optional[str] = None
+    ) -> Dict:
+        """Stacks the fewest candidates know, among those suggested for `interests` (or the whole catalog)"""
+        if interests:
+            names = {s["name"] for s in self.catalog.rank(interests, top_k=max(k, 20))}
+            entries = [e for e in self.catalog.entries if e["name"] in names]
+        else:
+            entries = list(self.catalog.entries)
+        if category:
+            entries = [e for e in entries if e["category"].lower() == category.strip().lower()]
+
+        # Distinct candidates across each stack's aliases: one listing "K8s"
+        # and another "Kubernetes" are two, a candidate listing both is one
+        counts = self.db.skill_group_counts({
+            entry["name"]: [entry["name"], *entry.get("aliases", [])]
+            for entry in entries
+        })
+        total = self.db.total_candidates()
+
+        gaps = []
+        for entry in entries:
+            known = counts.get(entry["name"], 0)
+            gaps.append({
+                "tech_stack": entry["name"],
+                "category": entry["category"],
+                "difficulty": entry["difficulty"],
+                "candidates_with_skill": known,
+                "candidates_missing": max(total - known, 0),
+                "coverage": round(known / total, 3) if total else 0.0,
+            })
+        gaps.sort(key=lambda g: (g["coverage"], g["tech_stack"]))
+        return {"total_candidates": total, "catalog_version": self.catalog.version, "gaps": gaps[:k]}
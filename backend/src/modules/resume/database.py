@@ -1,11 +1,28 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 import uuid
-from datetime import datetime
-from shared.database import get_db
+from datetime import datetime, timezone
+from shared.database import get_db, iter_keyset, project
+from shared.cache import get_cache
+from shared.config.settings import settings
+from shared.utils import apply_patch
+
+def _same_instant(a: Any, b: Any) -> bool:
+    """Compare two ISO timestamps exactly (microseconds included)"""
+    try:
+        return datetime.fromisoformat(str(a).replace("Z", "+00:00")) == datetime.fromisoformat(str(b).replace("Z", "+00:00"))
+    except ValueError:
+        return False
+
+class ResumeVersionConflict(Exception):
+    """The resume changed after the version the caller based its edit on"""
+
+# Columns that may be requested from the export endpoint
+EXPORT_FIELDS = ["id", "user_id", "data", "created_at", "updated_at"]
 
 class ResumeDatabase:
     def __init__(self):
         self.client = get_db()
+        self.read_cache = get_cache("resume_reads", settings.DB_READ_CACHE_TTL)
     
     def store_resume(self, data: Dict[str, Any], user_id: str = None) -> Dict[str, Any]:
         """Store parsed resume data in Supabase"""
@@ -32,21 +49,66 @@ class ResumeDatabase:
         else:
             return {"id": str(uuid.uuid4())}
     
-    def get_resume(self, candidate_id: str) -> Dict[str, Any]:
-        """Retrieve resume by candidate ID"""
-        result = self.client.table("resumes").select("*").eq("metadata->>candidate_id", candidate_id).execute()
+    def get_resume(self, candidate_id: str, fresh: bool = False) -> Dict[str, Any]:
+        """Retrieve resume by candidate ID (the row's primary key, as returned by store_resume)
+        
+        `fresh` skips the read cache, for callers about to write based on the row.
+        """
+        cache_key = f"resume:{candidate_id}"
+        cached = None if fresh else self.read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = self.client.table("resumes").select("*").eq("id", candidate_id).execute()
         
         if not result.data:
             raise Exception("Resume not found")
         
+        self.read_cache.set(cache_key, result.data[0])
         return result.data[0]
     
     def update_resume(self, candidate_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Update resume data"""
-        result = self.client.table("resumes").update(data).eq("metadata->>candidate_id", candidate_id).execute()
+        result = self.client.table("resumes").update(data).eq("id", candidate_id).execute()
+        self.read_cache.delete(f"resume:{candidate_id}")
         return result.data[0] if result.data else {}
     
+    def patch_resume(
+        self,
+        candidate_id: str,
+        operations: List[Dict[str, Any]],
+        expected_updated_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Apply a JSON Patch to the resume's `data` with optimistic concurrency
+        
+        The write only succeeds if `updated_at` still equals the version the
+        patch was based on (`expected_updated_at`, or the row just read), so a
+        concurrent edit raises ResumeVersionConflict instead of being lost.
+        """
+        row = self.get_resume(candidate_id, fresh=True)
+        if expected_updated_at and not _same_instant(expected_updated_at, row.get("updated_at")):
+            raise ResumeVersionConflict("Resume was modified since the given version")
+        version = expected_updated_at or row.get("updated_at")
+        patched = apply_patch(row.get("data") or {}, operations)
+        
+        query = self.client.table("resumes")\
+            .update({"data": patched, "updated_at": datetime.now(timezone.utc).isoformat()})\
+            .eq("id", candidate_id)
+        query = query.eq("updated_at", version) if version else query.is_("updated_at", "null")
+        result = query.execute()
+        
+        if not result.data:
+            raise ResumeVersionConflict("Resume was modified by another request")
+        self.read_cache.set(f"resume:{candidate_id}", result.data[0])
+        return result.data[0]
+    
     def list_resumes(self, limit: int = 50) -> list:
         """List all resumes"""
         result = self.client.table("resumes").select("*").limit(limit).execute()
         return result.data
+    
+    def export_resumes(self, fields: List[str], user_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream resumes oldest first, one keyset page in memory at a time"""
+        filters = {"user_id": user_id} if user_id else None
+        rows = iter_keyset(self.client, "resumes", fields, settings.EXPORT_PAGE_SIZE, filters)
+        return project(rows, fields)
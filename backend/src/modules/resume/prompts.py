@@ -0,0 +1,36 @@
+import json
+import os
+from shared.llm import PromptTemplate, get_prompt_registry
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schemas_data', 'resume_schema.json')
+
+with open(SCHEMA_PATH, "r") as f:
+    RESUME_SCHEMA = json.load(f)
+
+# The schema is serialized once here and baked into the template's static text
+RESUME_STRUCTURE = get_prompt_registry().register(PromptTemplate(
+    name="resume_structure",
+    version=1,
+    static={"schema": json.dumps(RESUME_SCHEMA, indent=2)},
+    template="""
+You are an expert resume parser. Extract information from the following resume text and structure it according to the provided JSON schema.
+
+Resume Text:
+{text}
+
+JSON Schema:
+{schema}
+
+Instructions:
+- Extract all relevant information from the resume text
+- Fill in the JSON schema with extracted data
+- Use empty strings for missing text fields
+- Use empty arrays for missing list fields
+- Use 0 for missing numeric fields
+- Infer information when possible (e.g., calculate duration_months from dates)
+- For dates, use ISO format (YYYY-MM-DD) when possible
+- Return ONLY valid JSON matching the schema, no additional text
+
+Output the complete JSON:
+"""
+))
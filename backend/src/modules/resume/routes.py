@@ -1,54 +1,81 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import Optional, Dict, Any
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request, Body
+from typing import Optional, Dict, Any, List, Union
 from .services import ResumeParser
-from .database import ResumeDatabase
-from .schemas import ResumeParseResponse, ResumeGetResponse, ResumeUpdateResponse
+from .database import ResumeDatabase, ResumeVersionConflict, EXPORT_FIELDS
+from .schemas import ResumeParseResponse, ResumeGetResponse, ResumeUpdateResponse, ResumePatchRequest
+from shared.middleware import get_admission_controller
+from shared.utils import (
+    conditional_json_response, FastJSONResponse, ndjson_response,
+    export_fields, require_export_access, compute_etag, dumps,
+    JsonPatchError, JsonPatchTestFailed
+)
 
 router = APIRouter()
 
 # Initialize services
 parser = ResumeParser()
 db = ResumeDatabase()
+admission = get_admission_controller()
 
 @router.post("/parse", response_model=ResumeParseResponse)
 async def parse_resume(
+    request: Request,
     file: UploadFile = File(...),
     user_id: Optional[str] = Form(None)
 ):
     """Parse uploaded resume file"""
-    try:
-        print(f"Received file: {file.filename}")
-        print(f"User ID: {user_id}")
-        contents = await file.read()
-        print(f"File size: {len(contents)} bytes")
+    # Anonymous uploads are rate limited per client address
+    client_key = user_id or (request.client.host if request.client else None)
+    async with admission.admit("resume_parse", client_key):
+        try:
+            print(f"Received file: {file.filename}")
+            print(f"User ID: {user_id}")
+            contents = await file.read()
+            print(f"File size: {len(contents)} bytes")
         
-        # Parse resume
-        print("Starting resume parsing...")
-        parsed_data = await parser.parse_resume(contents, file.filename)
-        print("Resume parsed successfully")
+            # Parse resume
+            print("Starting resume parsing...")
+            parsed_data = await parser.parse_resume(contents, file.filename)
+            print("Resume parsed successfully")
         
-        # Store in Supabase
-        print("Storing in Supabase...")
-        result = db.store_resume(parsed_data, user_id)
-        print(f"Stored successfully: {result}")
+            # Store in Supabase
+            print("Storing in Supabase...")
+            result = db.store_resume(parsed_data, user_id)
+            print(f"Stored successfully: {result}")
         
-        return {
-            "success": True,
-            "data": parsed_data,
-            "candidate_id": result.get("id")
-        }
-    except Exception as e:
-        print(f"ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+            # Pass-through LLM JSON: skip re-validation against ResumeParseResponse
+            return FastJSONResponse({
+                "success": True,
+                "data": parsed_data,
+                "candidate_id": result.get("id")
+            })
+        except Exception as e:
+            print(f"ERROR: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/export")
+async def export_resumes(request: Request, user_id: Optional[str] = None, fields: Optional[str] = None):
+    """Stream resumes as NDJSON (one row per line, oldest first)
+    
+    Without `user_id` every user's resumes are exported, which requires the
+    admin export token.
+    """
+    await require_export_access(request, user_id)
+    columns = export_fields(fields, EXPORT_FIELDS)
+    return ndjson_response(db.export_resumes(columns, user_id), filename="resumes.ndjson")
 
 @router.get("/{candidate_id}", response_model=ResumeGetResponse)
-async def get_resume(candidate_id: str):
+async def get_resume(candidate_id: str, request: Request):
     """Get resume by candidate ID"""
     try:
         data = db.get_resume(candidate_id)
-        return {"success": True, "data": data}
+        return conditional_json_response(
+            request,
+            {"success": True, "data": data},
+            data.get("updated_at")
+        )
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -57,6 +84,51 @@ async def update_resume(candidate_id: str, data: Dict[str, Any]):
     """Update resume data"""
     try:
         result = db.update_resume(candidate_id, data)
-        return {"success": True, "data": result}
+        return FastJSONResponse({"success": True, "data": result})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/{candidate_id}", response_model=ResumeUpdateResponse)
+async def patch_resume(
+    candidate_id: str,
+    request: Request,
+    patch: Union[List[Dict[str, Any]], ResumePatchRequest] = Body(...)
+):
+    """Apply RFC 6902 JSON Patch operations to the resume data
+    
+    The body is either the bare operations array or
+    `{"operations": [...], "updated_at": "..."}`. Send the ETag from GET as
+    If-Match (or the row's `updated_at`) and a concurrent edit is rejected
+    with 412 instead of being overwritten.
+    """
+    operations = patch.operations if isinstance(patch, ResumePatchRequest) else patch
+    expected_updated_at = patch.updated_at if isinstance(patch, ResumePatchRequest) else None
+    if_match = request.headers.get("if-match")
+    
+    try:
+        if if_match and if_match.strip() != "*":
+            current = db.get_resume(candidate_id, fresh=True)
+            etag = compute_etag(dumps({"success": True, "data": current}))
+            if etag.removeprefix("W/") not in [t.strip().removeprefix("W/") for t in if_match.split(",")]:
+                raise ResumeVersionConflict("Resume was modified since the given ETag")
+            expected_updated_at = expected_updated_at or current.get("updated_at")
+        
+        row = db.patch_resume(candidate_id, operations, expected_updated_at)
+    except ResumeVersionConflict as e:
+        # 412 when the client's precondition failed; 409 when we lost a race ourselves
+        status = 412 if (if_match or expected_updated_at) else 409
+        raise HTTPException(status_code=status, detail=str(e))
+    except JsonPatchTestFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    
+    # Small response: the new version, plus the ETag a follow-up GET would return
+    return FastJSONResponse(
+        {"success": True, "data": {"id": row.get("id"), "updated_at": row.get("updated_at")}},
+        headers={"ETag": compute_etag(dumps({"success": True, "data": row}))}
+    )
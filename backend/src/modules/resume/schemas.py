@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class ResumeParseResponse(BaseModel):
     success: bool
@@ -13,3 +13,7 @@ class ResumeGetResponse(BaseModel):
 class ResumeUpdateResponse(BaseModel):
     success: bool
     data: Dict[str, Any]
+
+class ResumePatchRequest(BaseModel):
+    operations: List[Dict[str, Any]]  # RFC 6902 operations on the resume data
+    updated_at: Optional[str] = None  # version the edit is based on
@@ -1,11 +1,15 @@
 import io
 import json
+import hashlib
 from datetime import datetime
 from PIL import Image
-from groq import Groq
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Tuple
 import fitz  # PyMuPDF for PDF text extraction
 from shared.config.settings import settings
+from shared.cache import get_cache
+from shared.llm import get_llm_policy
+from shared.profiling import profiled
+from ..prompts import RESUME_SCHEMA, RESUME_STRUCTURE
 
 # Try to import pytesseract for OCR
 try:
@@ -18,75 +22,128 @@ except ImportError:
 
 class ResumeParser:
     def __init__(self):
-        self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
-        
-        # Load schema from module directory
-        import os
-        schema_path = os.path.join(os.path.dirname(__file__), '..', 'schemas_data', 'resume_schema.json')
-        with open(schema_path, "r") as f:
-            self.schema = json.load(f)
+        self.llm = get_llm_policy(settings.GROQ_API_KEY)
+        self.parse_cache = get_cache("resume_parse", settings.RESUME_PARSE_CACHE_TTL)
+        self.schema = RESUME_SCHEMA
         
         print("ResumeParser initialized successfully")
     
     def extract_text_from_document(self, file_bytes: bytes, filename: str) -> str:
         """Extract text from PDF or image using PyMuPDF and pytesseract"""
+        text, _ = self._extract_text(file_bytes, filename)
+        return text
+    
+    def _extract_text(self, file_bytes: bytes, filename: str) -> Tuple[str, bool]:
+        """Extracted text, and whether it is the placeholder sample rather than the upload's"""
         try:
-            # Try PDF text extraction first (fastest)
             if filename.lower().endswith('.pdf'):
-                print("Attempting PDF text extraction...")
+                # Page-level hybrid: text layer where present, OCR only for image-only pages
+                print("Attempting page-level PDF extraction...")
                 text = self._extract_from_pdf(file_bytes)
                 if text and len(text.strip()) > 50:
                     print(f"Extracted {len(text)} characters from PDF")
-                    return text
-            
-            # Try OCR for images or scanned PDFs
-            if OCR_AVAILABLE:
+                    return text, False
+            elif OCR_AVAILABLE:
                 print("Attempting OCR extraction...")
                 text = self._extract_with_ocr(file_bytes, filename)
                 if text and len(text.strip()) > 50:
                     print(f"Extracted {len(text)} characters via OCR")
-                    return text
+                    return text, False
             
             # Fallback
             print("Using fallback text extraction")
-            return self._fallback_text_extraction()
+            return self._fallback_text_extraction(), True
             
         except Exception as e:
             print(f"Text extraction error: {e}")
-            return self._fallback_text_extraction()
+            return self._fallback_text_extraction(), True
     
     def _extract_from_pdf(self, file_bytes: bytes) -> str:
-        """Extract text from PDF using PyMuPDF"""
+        """Extract text page by page, stopping once the character budget is reached"""
+        budget = settings.EXTRACTION_CHAR_BUDGET
+        parts = []
+        total = 0
         try:
             doc = fitz.open(stream=file_bytes, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text.strip()
+            try:
+                for page_text in self._iter_pdf_pages(doc):
+                    if not page_text:
+                        continue
+                    parts.append(page_text)
+                    total += len(page_text)
+                    if total >= budget:
+                        print(f"Character budget ({budget}) reached, skipping remaining pages")
+                        break
+            finally:
+                doc.close()
         except Exception as e:
             print(f"PDF extraction failed: {e}")
+        return "\n".join(parts)[:budget].strip()
+    
+    def _iter_pdf_pages(self, doc) -> Iterator[str]:
+        """Yield each page's text: direct from the text layer, or OCR for image-only pages"""
+        ocr_pages = 0
+        for page in doc:
+            text = page.get_text().strip()
+            if not self._page_needs_ocr(page, text):
+                yield text
+            elif OCR_AVAILABLE:
+                ocr_pages += 1
+                print(f"Page {page.number + 1}: no usable text layer, running OCR")
+                yield self._ocr_page(page) or text
+            else:
+                yield text
+        if ocr_pages:
+            print(f"OCR'd {ocr_pages} of {len(doc)} pages")
+    
+    def _page_needs_ocr(self, page, page_text: str) -> bool:
+        """A page is treated as image-only when its text layer is (nearly) empty,
+        or when images cover most of it and text only a sliver (a scan whose
+        text layer is just a header, footer or page number)
+        """
+        if len(page_text) < settings.PDF_PAGE_MIN_TEXT_CHARS:
+            return True
+        page_rect = page.rect
+        page_area = page_rect.width * page_rect.height
+        if page_area <= 0:
+            return False
+        
+        def coverage(boxes) -> float:
+            area = 0.0
+            for box in boxes:
+                clipped = fitz.Rect(box) & page_rect
+                if not clipped.is_empty:
+                    area += clipped.width * clipped.height
+            # Overlapping boxes can add up to more than the page
+            return min(area / page_area, 1.0)
+        
+        try:
+            image_coverage = coverage(info["bbox"] for info in page.get_image_info())
+            text_coverage = coverage(block[:4] for block in page.get_text("blocks") if block[6] == 0)
+        except Exception as e:
+            print(f"Could not measure page {page.number + 1} layout: {e}")
+            return False
+        return (
+            image_coverage >= settings.PDF_PAGE_OCR_IMAGE_COVERAGE
+            and text_coverage < settings.PDF_PAGE_MIN_TEXT_COVERAGE
+        )
+    
+    def _ocr_page(self, page) -> str:
+        """OCR a single rendered PDF page"""
+        try:
+            pix = page.get_pixmap(dpi=settings.OCR_DPI)
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            return pytesseract.image_to_string(img).strip()
+        except Exception as e:
+            print(f"OCR failed on page {page.number + 1}: {e}")
             return ""
     
     def _extract_with_ocr(self, file_bytes: bytes, filename: str) -> str:
-        """Extract text using pytesseract OCR"""
+        """Extract text from an image using pytesseract OCR"""
         try:
-            if filename.lower().endswith('.pdf'):
-                # Convert PDF to images and OCR
-                doc = fitz.open(stream=file_bytes, filetype="pdf")
-                text = ""
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    pix = page.get_pixmap()
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    text += pytesseract.image_to_string(img) + "\n"
-                doc.close()
-                return text.strip()
-            else:
-                # Direct image OCR
-                image = Image.open(io.BytesIO(file_bytes))
-                text = pytesseract.image_to_string(image)
-                return text.strip()
+            image = Image.open(io.BytesIO(file_bytes))
+            text = pytesseract.image_to_string(image)
+            return text.strip()[:settings.EXTRACTION_CHAR_BUDGET]
         except Exception as e:
             print(f"OCR failed: {e}")
             return ""
@@ -124,48 +181,39 @@ class ResumeParser:
         English (Native), Spanish (Intermediate)
         """
     
+    @profiled("parse_resume")
     async def parse_resume(self, file_bytes: bytes, filename: str) -> Dict[str, Any]:
         """Parse resume using text extraction and Groq LLM"""
         
+        # Identical uploads (same bytes) reuse the earlier structured result,
+        # as long as it came from the current prompt version
+        cache_key = f"{RESUME_STRUCTURE.version_hash}:{hashlib.sha256(file_bytes).hexdigest()}"
+        cached = self.parse_cache.get(cache_key)
+        if cached is not None:
+            print(f"Resume parse cache hit for {filename}")
+            return cached
+        
         # Extract text
         print(f"Extracting text from {filename}...")
-        extracted_text = self.extract_text_from_document(file_bytes, filename)
+        extracted_text, used_fallback = self._extract_text(file_bytes, filename)
         print(f"Extracted text length: {len(extracted_text)}")
         
         # Use Groq LLM to structure the data
         print("Structuring data with LLM...")
-        structured_data = self.structure_with_llm(extracted_text, filename)
+        structured_data = await self.structure_with_llm(extracted_text, filename)
         
+        # A result built from the placeholder sample says nothing about this
+        # upload; don't let it stick for the cache TTL
+        if not used_fallback:
+            self.parse_cache.set(cache_key, structured_data)
         return structured_data
     
-    def structure_with_llm(self, text: str, filename: str) -> Dict[str, Any]:
+    async def structure_with_llm(self, text: str, filename: str) -> Dict[str, Any]:
         """Use Groq API to structure extracted text according to schema"""
         
-        prompt = f"""
-You are an expert resume parser. Extract information from the following resume text and structure it according to the provided JSON schema.
-
-Resume Text:
-{text}
-
-JSON Schema:
-{json.dumps(self.schema, indent=2)}
-
-Instructions:
-- Extract all relevant information from the resume text
-- Fill in the JSON schema with extracted data
-- Use empty strings for missing text fields
-- Use empty arrays for missing list fields
-- Use 0 for missing numeric fields
-- Infer information when possible (e.g., calculate duration_months from dates)
-- For dates, use ISO format (YYYY-MM-DD) when possible
-- Return ONLY valid JSON matching the schema, no additional text
-
-Output the complete JSON:
-"""
-        
-        response = self.groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
+        response = await self.llm.complete(
+            "resume_structure",
+            messages=RESUME_STRUCTURE.messages(text=text),
             temperature=0.1,
             max_tokens=8000
         )
@@ -1,34 +1,172 @@
 from supabase import create_client, Client
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Iterator
+from itertools import islice
 import json
+from shared.cache import get_cache
+from shared.config.settings import settings
+from shared.database import iter_keyset, project
+from shared.events import Event, get_event_bus, get_broadcaster
+from shared.profiling import profiled
+
+# PostgREST error code for an RPC whose SQL function doesn't exist
+MISSING_FUNCTION_CODE = "PGRST202"
+
+# Emitted when every day of a tech stack's roadmap is marked complete
+STACK_COMPLETED_EVENT = "roadmap.stack_completed"
+
+# Live update deltas pushed to the user's SSE stream (see /stream/{user_id})
+PROGRESS_DELTA = "progress"
+ROADMAP_CREATED_DELTA = "roadmap_created"
+ROADMAP_DELETED_DELTA = "roadmap_deleted"
+
+# Columns that may be requested from the export endpoint
+EXPORT_FIELDS = [
+    "id", "user_id", "roadmaps", "body_hashes", "progress", "is_active",
+    "start_date", "last_accessed", "created_at", "updated_at"
+]
+
+# Hashes per roadmap_bodies lookup, keeping the in.() filter well within URL limits
+BODY_FETCH_BATCH = 100
+
+def user_channel(user_id: str) -> str:
+    return f"roadmaps:{user_id}"
 
 class LearningRoadmapDB:
     def __init__(self, supabase_url: str, supabase_key: str):
         self.client: Client = create_client(supabase_url, supabase_key)
+        # Read-through caches; every write below invalidates precisely
+        self.read_cache = get_cache("roadmap_reads", settings.DB_READ_CACHE_TTL)
+        self.resume_cache = get_cache("resume_reads", settings.DB_READ_CACHE_TTL)
+        # Content-addressed bodies never change, so no invalidation is needed
+        self.body_cache = get_cache("roadmap_bodies", settings.ROADMAP_BODY_CACHE_TTL)
+    
+    def _invalidate_user(self, user_id: Optional[str]):
+        """Drop every cached read (latest, active, calendar months) for a user"""
+        if user_id:
+            self.read_cache.delete_prefix(f"user:{user_id}:")
+    
+    def _push(self, user_id: Optional[str], event: str, delta: Dict):
+        """Send a small delta to the user's connected clients (best effort)"""
+        if user_id:
+            get_broadcaster().publish(user_channel(user_id), event, delta)
+    
+    def _load_bodies(self, hashes: Iterable[str]) -> Dict[str, Dict]:
+        """Roadmap bodies by hash: cache first, then batched roadmap_bodies lookups"""
+        bodies = {}
+        missing = []
+        for body_hash in dict.fromkeys(hashes):
+            cached = self.body_cache.get(body_hash)
+            if cached is not None:
+                bodies[body_hash] = cached
+            else:
+                missing.append(body_hash)
+        
+        for start in range(0, len(missing), BODY_FETCH_BATCH):
+            result = self.client.table("roadmap_bodies")\
+                .select("hash, body")\
+                .in_("hash", missing[start:start + BODY_FETCH_BATCH])\
+                .execute()
+            for row in result.data or []:
+                bodies[row["hash"]] = row["body"]
+                self.body_cache.set(row["hash"], row["body"])
+        return bodies
+    
+    def _attach_bodies(self, rows: List[Dict], keep_hashes: bool = False) -> List[Dict]:
+        """Rebuild `roadmaps` on rows that reference roadmap_bodies
+        
+        Rows not migrated yet (no `body_hashes`) keep their inline `roadmaps`.
+        All rows share one body lookup.
+        """
+        bodies = self._load_bodies(h for row in rows for h in row.get("body_hashes") or [])
+        for row in rows:
+            hashes = row.get("body_hashes") if keep_hashes else row.pop("body_hashes", None)
+            if hashes is None:
+                continue
+            missing = [h for h in hashes if h not in bodies]
+            if missing:
+                print(f"Roadmap {row.get('id')} references missing bodies: {missing}")
+            row["roadmaps"] = [bodies[h] for h in hashes if h in bodies]
+        return rows
     
     def store_roadmap(self, user_id: str, roadmaps: List[Dict]) -> str:
-        """Store learning roadmap in database"""
+        """Store learning roadmap in database
+        
+        Bodies go to the content-addressed `roadmap_bodies` table (stored
+        once however many users get the same plan) and the row keeps only
+        their hashes, via the `create_learning_roadmap` function.
+        """
         try:
             from datetime import datetime
             
-            record = {
-                "user_id": user_id,
-                "roadmaps": roadmaps,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-                "start_date": datetime.now().date().isoformat()  # Store when roadmap starts
-            }
+            start_date = datetime.now().date().isoformat()  # Store when roadmap starts
+            try:
+                result = self.client.rpc("create_learning_roadmap", {
+                    "p_user_id": user_id,
+                    "p_roadmaps": roadmaps,
+                    "p_start_date": start_date
+                }).execute()
+                roadmap_id = result.data
+            except Exception as rpc_error:
+                if getattr(rpc_error, "code", None) != MISSING_FUNCTION_CODE:
+                    raise
+                # roadmap-bodies.sql not applied yet: store the bodies inline
+                record = {
+                    "user_id": user_id,
+                    "roadmaps": roadmaps,
+                    "created_at": datetime.now().isoformat(),
+                    "updated_at": datetime.now().isoformat(),
+                    "start_date": start_date
+                }
+                result = self.client.table("learning_roadmaps").insert(record).execute()
+                roadmap_id = result.data[0]["id"]
             
-            result = self.client.table("learning_roadmaps").insert(record).execute()
-            return result.data[0]["id"]
+            self._invalidate_user(user_id)
+            self._push(user_id, ROADMAP_CREATED_DELTA, {
+                "roadmap_id": roadmap_id,
+                "tech_stacks": [r.get("tech_stack") for r in roadmaps],
+                "start_date": start_date
+            })
+            return roadmap_id
             
         except Exception as e:
             print(f"Error storing roadmap: {e}")
             raise Exception(f"Failed to store roadmap: {str(e)}")
     
+    def list_recent_roadmaps(self, limit: int = None) -> List[Dict]:
+        """Individual generated roadmaps from the most recent rows, newest first"""
+        result = self.client.table("learning_roadmaps")\
+            .select("*")\
+            .order("created_at", desc=True)\
+            .limit(limit or settings.ROADMAP_INDEX_WARM_ROWS)\
+            .execute()
+        rows = self._attach_bodies(result.data)
+        return [roadmap for row in rows for roadmap in row.get("roadmaps") or []]
+    
+    def export_roadmaps(self, fields: List[str], user_id: Optional[str] = None) -> Iterator[Dict]:
+        """Stream roadmap rows oldest first, one keyset page in memory at a time"""
+        filters = {"user_id": user_id} if user_id else None
+        columns = [*fields, "body_hashes"] if "roadmaps" in fields else fields
+        rows = iter_keyset(self.client, "learning_roadmaps", columns, settings.EXPORT_PAGE_SIZE, filters)
+        if "roadmaps" in fields:
+            rows = self._iter_with_bodies(rows, settings.EXPORT_PAGE_SIZE)
+        return project(rows, fields)
+    
+    def _iter_with_bodies(self, rows: Iterator[Dict], batch_size: int) -> Iterator[Dict]:
+        """Attach bodies a page at a time, so each page costs one body lookup"""
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield from self._attach_bodies(batch, keep_hashes=True)
+    
     def get_user_roadmap(self, user_id: str) -> Optional[Dict]:
         """Get user's latest learning roadmap"""
+        cache_key = f"user:{user_id}:latest"
+        cached = self.read_cache.get(cache_key)
+        if cached is not None:
+            return cached["row"]
+        
         try:
             result = self.client.table("learning_roadmaps")\
                 .select("*")\
@@ -37,92 +175,165 @@ class LearningRoadmapDB:
                 .limit(1)\
                 .execute()
             
-            if result.data:
-                return result.data[0]
-            return None
+            row = self._attach_bodies(result.data)[0] if result.data else None
+            self.read_cache.set(cache_key, {"row": row})
+            return row
             
         except Exception as e:
             print(f"Error fetching roadmap: {e}")
             return None
     
     def update_progress(self, roadmap_id: str, tech_stack: str, day: int, completed: bool):
-        """Update progress for a specific day in the roadmap"""
+        """Update progress for a specific day in the roadmap
+        
+        One round-trip via the `set_roadmap_progress` function, which also
+        returns the stack's completion counts. Adding the skill to the resume
+        on 100% completion happens afterwards, off the request path.
+        """
         try:
-            # Get current progress and roadmap data
-            result = self.client.table("learning_roadmaps")\
-                .select("progress, roadmaps, user_id")\
-                .eq("id", roadmap_id)\
-                .single()\
-                .execute()
-            
-            current_progress = result.data.get("progress", {})
-            roadmaps = result.data.get("roadmaps", [])
-            user_id = result.data.get("user_id")
-            
-            # Update progress for this tech stack and day
-            if tech_stack not in current_progress:
-                current_progress[tech_stack] = {}
-            
-            current_progress[tech_stack][str(day)] = completed
+            try:
+                result = self.client.rpc("set_roadmap_progress", {
+                    "p_roadmap_id": roadmap_id,
+                    "p_tech_stack": tech_stack,
+                    "p_day": day,
+                    "p_completed": completed
+                }).execute()
+                if not result.data:
+                    raise Exception("Roadmap not found")
+                row = result.data[0]
+                user_id = row["user_id"]
+                total_days = row["total_days"] or 0
+                completed_days = row["completed_days"] or 0
+            except Exception as rpc_error:
+                if getattr(rpc_error, "code", None) != MISSING_FUNCTION_CODE:
+                    raise
+                # roadmap-progress-functions.sql not applied yet
+                user_id, total_days, completed_days = self._update_progress_fallback(
+                    roadmap_id, tech_stack, day, completed
+                )
             
-            # Update in database
-            self.client.table("learning_roadmaps")\
-                .update({"progress": current_progress})\
-                .eq("id", roadmap_id)\
-                .execute()
+            self._invalidate_user(user_id)
+            self._push(user_id, PROGRESS_DELTA, {
+                "roadmap_id": roadmap_id,
+                "tech_stack": tech_stack,
+                "day": day,
+                "completed": completed,
+                "completed_days": completed_days,
+                "total_days": total_days
+            })
             
-            # Check if this tech stack is now 100% complete
-            roadmap_data = next((r for r in roadmaps if r.get("tech_stack") == tech_stack), None)
-            if roadmap_data:
-                daily_plan = roadmap_data.get("daily_plan", [])
-                total_days = len(daily_plan)
-                completed_days = sum(1 for v in current_progress.get(tech_stack, {}).values() if v)
-                
-                # If 100% complete, add skill to user's resume
-                if total_days > 0 and completed_days == total_days:
-                    self._add_skill_to_resume(user_id, tech_stack)
+            # If 100% complete, add skill to user's resume (deferred)
+            if total_days > 0 and completed_days == total_days:
+                get_event_bus().publish(
+                    STACK_COMPLETED_EVENT,
+                    {"user_id": user_id, "skill": tech_stack},
+                    event_id=f"{STACK_COMPLETED_EVENT}:{user_id}:{tech_stack.lower()}"
+                )
             
             return True
         except Exception as e:
             print(f"Error updating progress: {e}")
             return False
     
+    def _update_progress_fallback(self, roadmap_id: str, tech_stack: str, day: int, completed: bool):
+        """Read-modify-write progress update; returns (user_id, total_days, completed_days)"""
+        # Get current progress and roadmap data
+        result = self.client.table("learning_roadmaps")\
+            .select("*")\
+            .eq("id", roadmap_id)\
+            .single()\
+            .execute()
+        
+        current_progress = result.data.get("progress") or {}
+        roadmaps = self._attach_bodies([result.data])[0].get("roadmaps") or []
+        user_id = result.data.get("user_id")
+        
+        # Update progress for this tech stack and day
+        if tech_stack not in current_progress:
+            current_progress[tech_stack] = {}
+        
+        current_progress[tech_stack][str(day)] = completed
+        
+        # Update in database (bump updated_at so HTTP validators change)
+        self.client.table("learning_roadmaps")\
+            .update({
+                "progress": current_progress,
+                "updated_at": datetime.now().isoformat()
+            })\
+            .eq("id", roadmap_id)\
+            .execute()
+        
+        roadmap_data = next((r for r in roadmaps if r.get("tech_stack") == tech_stack), None)
+        total_days = len(roadmap_data.get("daily_plan", [])) if roadmap_data else 0
+        completed_days = sum(1 for v in current_progress.get(tech_stack, {}).values() if v)
+        return user_id, total_days, completed_days
+    
+    def handle_stack_completed(self, event: Event):
+        """Event handler: add a fully completed tech stack to the user's resume"""
+        self._add_skill_to_resume(event.payload["user_id"], event.payload["skill"])
+    
     def _add_skill_to_resume(self, user_id: str, skill: str):
-        """Add completed skill to user's resume"""
+        """Add completed skill to user's latest resume
+        
+        Patches only `data->skills->technical` of the single latest row through
+        the `append_resume_skill` function. Idempotent: a skill that is
+        already present is left alone. Raises so the event bus can retry.
+        """
         try:
-            # Get user's resume
-            result = self.client.table("resumes")\
-                .select("data")\
-                .eq("user_id", user_id)\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if result.data:
-                resume_data = result.data[0]["data"]
-                
-                # Initialize skills structure if it doesn't exist
-                if "skills" not in resume_data:
-                    resume_data["skills"] = {"technical": [], "tools": [], "domain": []}
-                
-                # Add to technical skills if not already there
-                technical_skills = resume_data["skills"].get("technical", [])
-                if skill not in technical_skills:
-                    technical_skills.append(skill)
-                    resume_data["skills"]["technical"] = technical_skills
-                    
-                    # Update resume in database
-                    self.client.table("resumes")\
-                        .update({"data": resume_data})\
-                        .eq("user_id", user_id)\
-                        .execute()
-                    
-                    print(f"Added skill '{skill}' to user {user_id}'s resume")
-        except Exception as e:
-            print(f"Error adding skill to resume: {e}")
+            result = self.client.rpc("append_resume_skill", {
+                "p_user_id": user_id,
+                "p_skill": skill
+            }).execute()
+            resume_id = result.data
+        except Exception as rpc_error:
+            if getattr(rpc_error, "code", None) != MISSING_FUNCTION_CODE:
+                raise
+            resume_id = self._add_skill_to_resume_fallback(user_id, skill)
+        
+        if resume_id:
+            self.resume_cache.delete(f"resume:{resume_id}")
+            print(f"Added skill '{skill}' to user {user_id}'s resume")
+    
+    def _add_skill_to_resume_fallback(self, user_id: str, skill: str) -> Optional[str]:
+        """Read-modify-write of the latest resume row only; returns its id if changed"""
+        # Get user's resume
+        result = self.client.table("resumes")\
+            .select("id, data")\
+            .eq("user_id", user_id)\
+            .order("created_at", desc=True)\
+            .limit(1)\
+            .execute()
+        
+        if not result.data:
+            return None
+        
+        resume_id = result.data[0]["id"]
+        resume_data = result.data[0]["data"]
+        
+        # Initialize skills structure if it doesn't exist
+        if "skills" not in resume_data:
+            resume_data["skills"] = {"technical": [], "tools": [], "domain": []}
+        
+        # Add to technical skills if not already there
+        technical_skills = resume_data["skills"].get("technical", [])
+        if skill in technical_skills:
+            return None
+        technical_skills.append(skill)
+        resume_data["skills"]["technical"] = technical_skills
+        
+        self.client.table("resumes")\
+            .update({"data": resume_data})\
+            .eq("id", resume_id)\
+            .execute()
+        return resume_id
     
     def get_active_roadmap(self, user_id: str) -> Optional[Dict]:
         """Get user's active learning roadmap"""
+        cache_key = f"user:{user_id}:active"
+        cached = self.read_cache.get(cache_key)
+        if cached is not None:
+            return cached["row"]
+        
         try:
             result = self.client.table("learning_roadmaps")\
                 .select("*")\
@@ -132,103 +343,136 @@ class LearningRoadmapDB:
                 .limit(1)\
                 .execute()
             
-            if result.data:
-                return result.data[0]
-            return None
+            row = self._attach_bodies(result.data)[0] if result.data else None
+            self.read_cache.set(cache_key, {"row": row})
+            return row
         except Exception as e:
             print(f"Error fetching active roadmap: {e}")
             return None
     
+    @profiled("get_calendar_events")
     def get_calendar_events(self, user_id: str, month: int, year: int) -> List[Dict]:
         """Get calendar events for a specific month"""
+        cache_key = f"user:{user_id}:calendar:{year}-{month}"
+        cached = self.read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            from datetime import datetime, timedelta
+            events = list(self._fetch_calendar_events(user_id, month, year))
+            self.read_cache.set(cache_key, events)
+            return events
+        except Exception as e:
+            print(f"Error fetching calendar events: {e}")
+            return []
+    
+    def iter_calendar_events(self, user_id: str, month: int, year: int) -> Iterator[Dict]:
+        """Calendar events for a specific month, without building the full list.
+
+        The roadmaps (and their bodies) are fetched before this returns, so
+        database errors surface here; only building each event is deferred.
+        """
+        cached = self.read_cache.get(f"user:{user_id}:calendar:{year}-{month}")
+        if cached is not None:
+            return iter(cached)
+        return self._fetch_calendar_events(user_id, month, year)
+    
+    def _fetch_calendar_events(self, user_id: str, month: int, year: int) -> Iterator[Dict]:
+        """Uncached calendar events; the roadmaps are read before this returns"""
+        # Get all active roadmaps
+        result = self.client.table("learning_roadmaps")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .eq("is_active", True)\
+            .execute()
+        
+        return self._calendar_events(self._attach_bodies(result.data), month, year)
+    
+    def _calendar_events(self, rows: List[Dict], month: int, year: int) -> Iterator[Dict]:
+        from datetime import datetime, timedelta
+        import re
+        
+        for roadmap_data in rows:
+            roadmaps = roadmap_data.get("roadmaps") or []
+            progress = roadmap_data.get("progress", {})
             
-            # Get all active roadmaps
-            result = self.client.table("learning_roadmaps")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .eq("is_active", True)\
-                .execute()
+            # Get start date (when roadmap was created)
+            start_date_str = roadmap_data.get("start_date") or roadmap_data.get("created_at")
+            if start_date_str:
+                start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00')).date()
+            else:
+                start_date = datetime.now().date()
             
-            events = []
-            for roadmap_data in result.data:
-                roadmaps = roadmap_data.get("roadmaps", [])
-                progress = roadmap_data.get("progress", {})
+            for roadmap in roadmaps:
+                tech_stack = roadmap.get("tech_stack")
+                daily_plan = roadmap.get("daily_plan", [])
+                projects = roadmap.get("projects", [])
                 
-                # Get start date (when roadmap was created)
-                start_date_str = roadmap_data.get("start_date") or roadmap_data.get("created_at")
-                if start_date_str:
-                    start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00')).date()
-                else:
-                    start_date = datetime.now().date()
-                
-                for roadmap in roadmaps:
-                    tech_stack = roadmap.get("tech_stack")
-                    daily_plan = roadmap.get("daily_plan", [])
-                    projects = roadmap.get("projects", [])
-                    
-                    # Add daily tasks with actual calendar dates
-                    for day_info in daily_plan:
-                        day_num = day_info.get("day")
+                # Add daily tasks with actual calendar dates
+                for day_info in daily_plan:
+                    # A malformed day entry skips that day, not the month
+                    try:
+                        day_num = int(day_info.get("day"))
                         # Calculate actual calendar date: start_date + (day_num - 1) days
                         actual_date = start_date + timedelta(days=day_num - 1)
-                        
-                        # Only include if this date is in the requested month/year
-                        if actual_date.month == month and actual_date.year == year:
-                            is_completed = progress.get(tech_stack, {}).get(str(day_num), False)
-                            
-                            events.append({
-                                "roadmap_id": roadmap_data["id"],
-                                "tech_stack": tech_stack,
-                                "day": actual_date.day,  # Calendar day (1-31)
-                                "roadmap_day": day_num,  # Roadmap day (1-7, etc.)
-                                "date": actual_date.isoformat(),
-                                "title": day_info.get("title"),
-                                "type": "task",
-                                "completed": is_completed,
-                                "estimated_hours": day_info.get("estimated_hours", 0)
-                            })
+                    except (TypeError, ValueError, AttributeError, OverflowError):
+                        continue
                     
-                    # Add project events with actual dates
-                    for project in projects:
+                    # Only include if this date is in the requested month/year
+                    if actual_date.month == month and actual_date.year == year:
+                        is_completed = progress.get(tech_stack, {}).get(str(day_num), False)
+                        
+                        yield {
+                            "roadmap_id": roadmap_data["id"],
+                            "tech_stack": tech_stack,
+                            "day": actual_date.day,  # Calendar day (1-31)
+                            "roadmap_day": day_num,  # Roadmap day (1-7, etc.)
+                            "date": actual_date.isoformat(),
+                            "title": day_info.get("title"),
+                            "type": "task",
+                            "completed": is_completed,
+                            "estimated_hours": day_info.get("estimated_hours", 0)
+                        }
+                
+                # Add project events with actual dates
+                for project_info in projects:
+                    # A malformed project entry skips that project, not the month
+                    try:
                         # Parse day range (e.g., "Days 3-5" -> days 3 to 5)
-                        day_range = project.get("day_range", "")
-                        if day_range:
-                            try:
-                                # Extract numbers from "Days X-Y" or "Day X"
-                                import re
-                                numbers = re.findall(r'\d+', day_range)
-                                if numbers:
-                                    project_day = int(numbers[0])
-                                    project_date = start_date + timedelta(days=project_day - 1)
-                                    
-                                    if project_date.month == month and project_date.year == year:
-                                        events.append({
-                                            "roadmap_id": roadmap_data["id"],
-                                            "tech_stack": tech_stack,
-                                            "day": project_date.day,
-                                            "date": project_date.isoformat(),
-                                            "title": project.get("title"),
-                                            "type": "project",
-                                            "day_range": day_range,
-                                            "estimated_hours": project.get("estimated_hours", 0)
-                                        })
-                            except:
-                                pass
-            
-            return events
-        except Exception as e:
-            print(f"Error fetching calendar events: {e}")
-            return []
+                        day_range = project_info.get("day_range", "")
+                        if not day_range:
+                            continue
+                        # Extract numbers from "Days X-Y" or "Day X"
+                        numbers = re.findall(r'\d+', day_range)
+                        if not numbers:
+                            continue
+                        project_day = int(numbers[0])
+                        project_date = start_date + timedelta(days=project_day - 1)
+                    except (TypeError, ValueError, AttributeError, OverflowError):
+                        continue
+                    
+                    if project_date.month == month and project_date.year == year:
+                        yield {
+                            "roadmap_id": roadmap_data["id"],
+                            "tech_stack": tech_stack,
+                            "day": project_date.day,
+                            "date": project_date.isoformat(),
+                            "title": project_info.get("title"),
+                            "type": "project",
+                            "day_range": day_range,
+                            "estimated_hours": project_info.get("estimated_hours", 0)
+                        }
     
     def delete_roadmap(self, roadmap_id: str) -> bool:
         """Delete a roadmap by ID"""
         try:
-            self.client.table("learning_roadmaps")\
+            result = self.client.table("learning_roadmaps")\
                 .delete()\
                 .eq("id", roadmap_id)\
                 .execute()
+            for row in result.data or []:
+                self._invalidate_user(row.get("user_id"))
+                self._push(row.get("user_id"), ROADMAP_DELETED_DELTA, {"roadmap_id": roadmap_id})
             return True
         except Exception as e:
             print(f"Error deleting roadmap: {e}")
@@ -0,0 +1,130 @@
+from shared.llm import PromptTemplate, get_prompt_registry
+
+# Bump a template's version when its wording changes in a way that should
+# invalidate cached roadmaps (the version hash changes on any edit anyway)
+
+ROADMAP_GENERATE = get_prompt_registry().register(PromptTemplate(
+    name="roadmap_generate",
+    version=1,
+    system="You are a passionate, encouraging technical educator who makes learning exciting and approachable. Write in a warm, conversational tone that motivates learners. Explain concepts clearly with real-world context and analogies. Make technical topics feel accessible and fun! CRITICAL: Always return valid JSON with properly escaped quotes and newlines.",
+    template="""Create a detailed day-by-day learning roadmap for {tech_stack}.
+
+Duration: {duration_days} days
+User's skill level: {skill_level}{user_skills_context}
+
+IMPORTANT: Return ONLY valid JSON. Use simple descriptions without complex quotes or special characters.
+
+Create a {duration_days}-day learning plan with:
+- Daily breakdown with specific tasks
+- Hands-on exercises and projects
+- Clear learning objectives
+- Resource recommendations
+- Milestone checkpoints
+
+Return valid JSON with this structure:
+{{
+  "tech_stack": "{tech_stack}",
+  "duration_days": {duration_days},
+  "skill_level": "{skill_level}",
+  "overview": "Brief overview of what the learner will master",
+  "prerequisites": ["Prerequisite 1", "Prerequisite 2"],
+  "daily_plan": [
+    {{
+      "day": 1,
+      "title": "Day 1: Setup and Introduction",
+      "focus": "Getting started with the basics",
+      "topics": [
+        "Setting up development environment and installing required tools",
+        "Understanding core concepts and why this technology is useful",
+        "Running your first example to verify everything works"
+      ],
+      "learning_objectives": [
+        "Have a working development environment",
+        "Understand the fundamental concepts"
+      ],
+      "hands_on_tasks": [
+        "Install and configure the technology",
+        "Run a hello world example",
+        "Explore the official documentation"
+      ],
+      "practice_exercises": [
+        "Modify the example to add custom functionality",
+        "Experiment with different configurations"
+      ],
+      "resources": [
+        "Official documentation",
+        "Getting started tutorial"
+      ],
+      "estimated_hours": 3,
+      "checkpoint": "You should have the technology installed and running with a basic understanding of its purpose"
+    }}
+  ],
+  "projects": [
+    {{
+      "day_range": "Days 3-5",
+      "title": "Mini Project: Build a Simple Application",
+      "description": "Apply what you learned to create a functional project",
+      "objectives": ["Apply core concepts", "Build something real"],
+      "technologies_used": ["Tech 1", "Tech 2"],
+      "estimated_hours": 6
+    }}
+  ],
+  "capstone_project": {{
+    "title": "Final Project: Comprehensive Application",
+    "description": "Build a complete application showcasing all learned skills",
+    "features": ["Feature 1", "Feature 2", "Feature 3"],
+    "technologies": ["All technologies learned"],
+    "estimated_hours": 15,
+    "deliverables": ["Working application", "Documentation", "Deployment"]
+  }},
+  "milestones": [
+    {{
+      "day": 5,
+      "title": "Milestone 1: Fundamentals Complete",
+      "achievement": "You have mastered the basics and built your first project"
+    }}
+  ],
+  "resources": {{
+    "documentation": ["Official docs"],
+    "tutorials": ["Tutorial links"],
+    "videos": ["Video courses"],
+    "books": ["Recommended books"],
+    "communities": ["Community links"]
+  }},
+  "next_steps": [
+    "Explore advanced topics",
+    "Build more complex projects",
+    "Join the community"
+  ]
+}}
+
+Make descriptions clear and actionable. Keep it professional but encouraging."""
+))
+
+TECHSTACK_RERANK = get_prompt_registry().register(PromptTemplate(
+    name="techstack_rerank",
+    version=1,
+    system="You are an expert tech advisor with deep knowledge of latest technologies, frameworks, and industry trends.",
+    template="""Based on user interests: {interests}
+
+User's existing skills: {user_skills_str}
+
+Latest industry trends (from web search):
+{web_context}
+
+Candidate technologies: {candidates}
+
+Re-rank the candidates from most to least relevant for this user and give each a relevance_score from 1-10.
+Use only names from the candidate list. Return ONLY valid JSON:
+{{"ranking": [{{"name": "Candidate name", "relevance_score": 9}}]}}"""
+))
+
+ROADMAP_EXTEND = get_prompt_registry().register(PromptTemplate(
+    name="roadmap_extend",
+    version=1,
+    template="""A {skill_level} learner is following this {tech_stack} roadmap:
+{covered}
+
+Write days {first_day} to {last_day} that continue it. Return ONLY valid JSON:
+{{"daily_plan": [{{"day": {first_day}, "title": "Day {first_day}: ...", "focus": "...", "topics": ["..."], "learning_objectives": ["..."], "hands_on_tasks": ["..."], "practice_exercises": ["..."], "resources": ["..."], "estimated_hours": 3, "checkpoint": "..."}}]}}"""
+))
@@ -1,72 +1,125 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import Optional
 from .schemas import (
     InterestsRequest, RoadmapRequest, ProgressUpdate,
     TechStackSuggestion, RoadmapResponse
 )
 from .services.roadmap_generator import RoadmapGenerator
-from .database import LearningRoadmapDB
+from .services.prefetch import RoadmapPrefetcher
+from .database import LearningRoadmapDB, STACK_COMPLETED_EVENT, EXPORT_FIELDS, user_channel
 from shared.config.settings import settings
+from shared.events import get_event_bus, sse_response
+from shared.middleware import get_admission_controller
+from shared.utils import (
+    conditional_json_response, FastJSONResponse, streaming_json_response, ndjson_response,
+    export_fields, require_export_access
+)
 
 router = APIRouter()
 
 # Initialize services
-roadmap_gen = RoadmapGenerator(settings.GROQ_API_KEY)
 db = LearningRoadmapDB(
     settings.SUPABASE_URL,
     settings.SUPABASE_KEY
 )
+roadmap_gen = RoadmapGenerator(settings.GROQ_API_KEY, roadmap_source=db.list_recent_roadmaps)
+admission = get_admission_controller()
+prefetcher = RoadmapPrefetcher(roadmap_gen, admission)
+
+# Skill propagation runs in the background after progress updates
+get_event_bus().subscribe(STACK_COMPLETED_EVENT, db.handle_stack_completed)
 
 @router.post("/suggest-techstacks")
 async def suggest_techstacks(request: InterestsRequest):
-    """Generate tech stack suggestions based on user interests"""
-    try:
-        suggestions = await roadmap_gen.suggest_techstacks(request.interests, request.user_skills)
-        return {"techstacks": suggestions}
-    except Exception as e:
-        # Log the full error for debugging
-        import traceback
-        print(f"ERROR suggesting tech stacks: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Failed to suggest tech stacks: {str(e)}")
+    """Suggest tech stacks ranked from the local catalog"""
+    async with admission.admit("techstack_suggest", request.user_id):
+        try:
+            suggestions = await roadmap_gen.suggest_techstacks(request.interests, request.user_skills)
+            # Warm the generation cache for the likely picks (no-op unless enabled)
+            prefetcher.schedule(suggestions, request.user_skills)
+            return {"techstacks": suggestions, "catalog_version": roadmap_gen.catalog.version}
+        except Exception as e:
+            # Log the full error for debugging
+            import traceback
+            print(f"ERROR suggesting tech stacks: {str(e)}")
+            print(f"Traceback: {traceback.format_exc()}")
+            raise HTTPException(status_code=500, detail=f"Failed to suggest tech stacks: {str(e)}")
 
 @router.post("/generate", response_model=RoadmapResponse)
 async def generate_roadmap(request: RoadmapRequest):
     """Generate personalized learning roadmap for selected tech stacks"""
-    try:
-        roadmaps = []
+    keys = [
+        roadmap_gen.generation_cache_key(
+            selection.tech_stack, selection.duration_days, selection.skill_level, request.user_skills
+        )
+        for selection in request.selections
+    ]
+    # Speculative work gives its slot (and Groq capacity) back to real users,
+    # but only once this request is actually going to run
+    async with admission.admit("roadmap_generate", request.user_id, on_wait=lambda: prefetcher.preempt(keys)):
+        await prefetcher.yield_to(keys)
+        try:
+            roadmaps = []
         
-        for selection in request.selections:
-            roadmap = await roadmap_gen.generate_roadmap(
-                tech_stack=selection.tech_stack,
-                duration_days=selection.duration_days,
-                skill_level=selection.skill_level,
-                user_skills=request.user_skills
-            )
-            roadmaps.append(roadmap)
+            for selection in request.selections:
+                prefetcher.record_demand(
+                    selection.tech_stack, selection.duration_days,
+                    selection.skill_level, request.user_skills
+                )
+                roadmap = await roadmap_gen.generate_roadmap(
+                    tech_stack=selection.tech_stack,
+                    duration_days=selection.duration_days,
+                    skill_level=selection.skill_level,
+                    user_skills=request.user_skills
+                )
+                roadmaps.append(roadmap)
         
-        # Store in database
-        roadmap_id = db.store_roadmap(request.user_id, roadmaps)
+            # Store in database
+            roadmap_id = db.store_roadmap(request.user_id, roadmaps)
         
-        return {
-            "roadmap_id": roadmap_id,
-            "roadmaps": roadmaps
-        }
-    except Exception as e:
-        # Log the full error for debugging
-        import traceback
-        print(f"ERROR generating roadmap: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate roadmap: {str(e)}")
+            # Pass-through LLM JSON: skip re-validation against RoadmapResponse
+            return FastJSONResponse({
+                "roadmap_id": roadmap_id,
+                "roadmaps": roadmaps
+            })
+        except Exception as e:
+            # Log the full error for debugging
+            import traceback
+            print(f"ERROR generating roadmap: {str(e)}")
+            print(f"Traceback: {traceback.format_exc()}")
+            raise HTTPException(status_code=500, detail=f"Failed to generate roadmap: {str(e)}")
+
+@router.get("/export")
+async def export_roadmaps(request: Request, user_id: Optional[str] = None, fields: Optional[str] = None):
+    """Stream learning roadmap rows as NDJSON (one row per line, oldest first)
+    
+    Pass `user_id` for one user's full history; without it every user's rows
+    are exported, which requires the admin export token.
+    """
+    await require_export_access(request, user_id)
+    columns = export_fields(fields, EXPORT_FIELDS)
+    return ndjson_response(db.export_roadmaps(columns, user_id), filename="learning_roadmaps.ndjson")
+
+@router.get("/stream/{user_id}")
+async def stream_roadmap_updates(user_id: str, request: Request, last_event_id: Optional[str] = None):
+    """Server-Sent Events stream of the user's roadmap changes
+    
+    Pushes `progress`, `roadmap_created` and `roadmap_deleted` deltas as they
+    happen, so clients apply them to local state instead of polling. A
+    reconnecting client (Last-Event-ID header, or `last_event_id` for clients
+    that can't set headers) gets what it missed, or a `resync` event when it
+    should refetch.
+    """
+    return sse_response(user_channel(user_id), request.headers.get("last-event-id") or last_event_id)
 
 @router.get("/{user_id}")
-async def get_user_roadmap(user_id: str):
+async def get_user_roadmap(user_id: str, request: Request):
     """Get user's learning roadmap"""
     try:
         roadmap = db.get_user_roadmap(user_id)
         if not roadmap:
             raise HTTPException(status_code=404, detail="Roadmap not found")
-        return roadmap
+        return conditional_json_response(request, roadmap, roadmap.get("updated_at"))
     except HTTPException:
         raise
     except Exception as e:
@@ -89,19 +142,33 @@ async def update_roadmap_progress(roadmap_id: str, update: ProgressUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/active/{user_id}")
-async def get_active_roadmap(user_id: str):
+async def get_active_roadmap(user_id: str, request: Request):
     """Get user's active learning roadmap"""
     try:
         roadmap = db.get_active_roadmap(user_id)
         if not roadmap:
-            return {"active": False, "roadmap": None}
-        return {"active": True, "roadmap": roadmap}
+            return conditional_json_response(request, {"active": False, "roadmap": None})
+        return conditional_json_response(
+            request,
+            {"active": True, "roadmap": roadmap},
+            roadmap.get("updated_at")
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/calendar/{user_id}")
-async def get_calendar_events(user_id: str, month: Optional[int] = None, year: Optional[int] = None):
-    """Get calendar events for user's learning roadmaps"""
+async def get_calendar_events(
+    user_id: str,
+    request: Request,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    stream: bool = False
+):
+    """Get calendar events for user's learning roadmaps
+    
+    With `stream=true` events are encoded and sent one at a time instead of
+    being collected first (no ETag in that mode).
+    """
     try:
         from datetime import datetime
         if not month or not year:
@@ -109,8 +176,16 @@ async def get_calendar_events(user_id: str, month: Optional[int] = None, year: O
             month = now.month
             year = now.year
         
+        if stream:
+            return streaming_json_response(
+                {"month": month, "year": year},
+                "events",
+                db.iter_calendar_events(user_id, month, year)
+            )
+        
         events = db.get_calendar_events(user_id, month, year)
-        return {"events": events, "month": month, "year": year}
+        # Aggregates several rows, so validate on the content hash only
+        return conditional_json_response(request, {"events": events, "month": month, "year": year})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,3 +1,4 @@
 from .roadmap_generator import RoadmapGenerator
+from .prefetch import RoadmapPrefetcher
 
-__all__ = ['RoadmapGenerator']
+__all__ = ['RoadmapGenerator', 'RoadmapPrefetcher']
@@ -0,0 +1,162 @@
+import asyncio
+import contextvars
+import itertools
+import time
+from collections import deque
+from typing import Collection, Dict, List, Optional
+from shared.cache import get_cache
+from shared.config.settings import settings
+
+
+class RoadmapPrefetcher:
+    """Speculatively generates the roadmaps a user is likely to pick next.
+
+    After suggestions are returned, the top entries are queued at the most
+    common duration/skill level and generated in the background to warm the
+    generation cache. Jobs run one at a time, only while no interactive
+    generation is in flight, and within an hourly budget. A running job holds
+    a roadmap_generate slot and gives way to interactive generations on this
+    worker: it is cancelled, unless it is producing a roadmap the interactive
+    request asked for, in which case that request waits for it instead.
+    """
+
+    def __init__(self, generator, admission):
+        self.generator = generator
+        self.admission = admission
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._current: Optional[asyncio.Task] = None
+        self._current_key: Optional[str] = None
+        self._queued: set = set()
+        self._started: deque = deque()  # job start times within the last hour
+        self._sequence = itertools.count()
+        # Which cache keys were warmed by prefetch, shared across workers
+        self.markers = get_cache("roadmap_prefetch", settings.ROADMAP_GENERATION_CACHE_TTL)
+        self.stats = {
+            "queued": 0, "generated": 0, "skipped_budget": 0, "preempted": 0, "failed": 0, "hits": 0, "misses": 0
+        }
+
+    def schedule(self, suggestions: List[Dict], user_skills: List[str] = None) -> None:
+        """Queue background generation for the top suggestions"""
+        if not settings.PREFETCH_ENABLED:
+            return
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue(maxsize=settings.PREFETCH_MAX_QUEUE)
+        if self._worker is None or self._worker.done():
+            # Start from an empty context: the worker outlives this request and
+            # must not inherit its state (e.g. an active profiling capture)
+            self._worker = contextvars.Context().run(asyncio.create_task, self._run())
+
+        candidates = [s for s in suggestions if not s.get("already_known")][:settings.PREFETCH_TOP_K]
+        for rank, suggestion in enumerate(candidates):
+            for duration_days in settings.PREFETCH_DURATIONS:
+                job = (suggestion["name"], duration_days, settings.PREFETCH_SKILL_LEVEL, list(user_skills or []))
+                key = self.generator.generation_cache_key(*job)
+                if key in self._queued or self.generator.generation_cache.contains(key):
+                    continue
+                try:
+                    self._queue.put_nowait((rank, next(self._sequence), key, job))
+                except asyncio.QueueFull:
+                    return
+                self._queued.add(key)
+                self.stats["queued"] += 1
+
+    def preempt(self, keep: Collection[str] = ()) -> None:
+        """Cancel the running prefetch job unless it is generating one of the `keep` cache keys"""
+        if self._current is not None and not self._current.done() and self._current_key not in keep:
+            self._current.cancel()
+
+    async def yield_to(self, keys: Collection[str]) -> None:
+        """Make way for an admitted interactive generation of the given cache keys.
+
+        A running job for one of those roadmaps is awaited, so its result is
+        served from the cache instead of being generated twice; any other
+        running job is cancelled.
+        """
+        task = self._current
+        if task is None or task.done():
+            return
+        if self._current_key in keys:
+            # wait() rather than await: a disconnecting client mustn't cancel the job
+            await asyncio.wait({task})
+        else:
+            task.cancel()
+
+    def record_demand(self, tech_stack: str, duration_days: int, skill_level: str, user_skills: List[str] = None) -> None:
+        """Count an interactive request as a prefetch hit if its roadmap was warmed by us"""
+        if not settings.PREFETCH_ENABLED:
+            return
+        key = self.generator.generation_cache_key(tech_stack, duration_days, skill_level, user_skills)
+        if self.markers.get(key) is not None:
+            self.stats["hits"] += 1
+            # Count each prefetched roadmap at most once
+            self.markers.delete(key)
+        else:
+            self.stats["misses"] += 1
+
+    def _within_budget(self) -> bool:
+        hour_ago = time.monotonic() - 3600
+        while self._started and self._started[0] < hour_ago:
+            self._started.popleft()
+        return len(self._started) < settings.PREFETCH_MAX_PER_HOUR
+
+    async def _run(self) -> None:
+        while True:
+            _, _, key, job = await self._queue.get()
+            lease_id = None
+            try:
+                # Yield to interactive traffic: wait until no generation is in
+                # flight, then hold a slot so new requests are counted against us
+                while True:
+                    if await self.admission.in_flight("roadmap_generate") == 0:
+                        lease_id = await self.admission.try_acquire_now("roadmap_generate")
+                        if lease_id is not None:
+                            break
+                    await asyncio.sleep(settings.PREFETCH_IDLE_POLL)
+
+                if not self._within_budget():
+                    self.stats["skipped_budget"] += 1
+                    continue
+                if self.generator.generation_cache.contains(key):
+                    continue
+
+                self._started.append(time.monotonic())
+                tech_stack, duration_days, skill_level, user_skills = job
+                self._current_key = key
+                self._current = asyncio.create_task(self.generator.generate_roadmap(
+                    tech_stack=tech_stack,
+                    duration_days=duration_days,
+                    skill_level=skill_level,
+                    user_skills=user_skills
+                ))
+                # wait() rather than await, so a preempt() doesn't cancel the worker itself
+                await asyncio.wait({self._current})
+                if self._current.cancelled():
+                    self.stats["preempted"] += 1
+                    print(f"Prefetch for {tech_stack} preempted by interactive generation")
+                    continue
+                self._current.result()
+                self.markers.set(key, True)
+                self.stats["generated"] += 1
+                print(f"Prefetched roadmap for {tech_stack} ({duration_days} days, {skill_level})")
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"Prefetch failed for {job[0]}: {e}")
+            finally:
+                if self._current is not None and not self._current.done():
+                    self._current.cancel()
+                self._current = None
+                self._current_key = None
+                if lease_id is not None:
+                    await self.admission.release("roadmap_generate", lease_id)
+                self._queued.discard(key)
+                self._queue.task_done()
+
+    def metrics(self) -> Dict:
+        demand = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "hit_rate": round(self.stats["hits"] / demand, 3) if demand else 0.0,
+            "useful_ratio": round(self.stats["hits"] / self.stats["generated"], 3) if self.stats["generated"] else 0.0,
+        }
@@ -1,15 +1,36 @@
+import asyncio
 import json
-from groq import Groq
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from duckduckgo_search import DDGS
+from shared.cache import get_cache, make_key
+from shared.config.settings import settings
+from shared.llm import get_llm_policy
+from shared.profiling import profiled
+from ..prompts import ROADMAP_GENERATE, ROADMAP_EXTEND, TECHSTACK_RERANK
+from .roadmap_index import RoadmapSimilarityIndex, trim_roadmap
+from .tech_catalog import TechCatalog
 
 class RoadmapGenerator:
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.3-70b-versatile"
+    def __init__(self, api_key: str, roadmap_source: Optional[Callable[[], List[Dict]]] = None):
+        self.llm = get_llm_policy(api_key)
+        self.search_cache = get_cache("web_search", settings.WEB_SEARCH_CACHE_TTL)
+        self.generation_cache = get_cache("roadmap_generation", settings.ROADMAP_GENERATION_CACHE_TTL)
+        self.catalog = TechCatalog()
+        # Near-duplicate reuse ("React.js" vs "ReactJS"); warmed lazily from roadmap_source
+        self.similarity_index = RoadmapSimilarityIndex(
+            threshold=settings.ROADMAP_REUSE_THRESHOLD,
+            max_extend_days=settings.ROADMAP_REUSE_MAX_EXTEND_DAYS,
+            max_entries=settings.ROADMAP_INDEX_MAX_ENTRIES,
+            loader=roadmap_source
+        )
     
     def web_search_technologies(self, interests: List[str]) -> List[str]:
         """Search web for latest technologies related to interests"""
+        cache_key = make_key(sorted(i.strip().lower() for i in interests))
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             ddgs = DDGS()
             search_query = f"{' '.join(interests)} latest technologies tools frameworks 2026"
@@ -21,223 +42,96 @@ class RoadmapGenerator:
                 content = result.get('body', '') + ' ' + result.get('title', '')
                 tech_mentions.append(content)
             
+            self.search_cache.set(cache_key, tech_mentions)
             return tech_mentions
         except Exception as e:
             print(f"Web search error: {e}")
             return []
     
     async def suggest_techstacks(self, interests: List[str], user_skills: List[str] = None) -> List[Dict]:
-        """Generate comprehensive tech stack suggestions with web search"""
-        
-        # Get web search results for latest tech
-        web_results = self.web_search_technologies(interests)
-        web_context = "\n".join(web_results[:5]) if web_results else ""
+        """Rank catalog technologies against interests; optionally let the LLM re-rank the top"""
+        suggestions = self.catalog.rank(interests, user_skills, top_k=settings.TECHSTACK_SUGGESTION_COUNT)
         
-        user_skills_str = ", ".join(user_skills) if user_skills else "None"
+        if not settings.TECHSTACK_LLM_RERANK:
+            return suggestions
         
-        prompt = f"""Based on user interests: {', '.join(interests)}
-
-User's existing skills: {user_skills_str}
-
-Latest industry trends (from web search):
-{web_context}
-
-Generate 15-20 comprehensive technology recommendations covering:
-- Core frameworks and libraries
-- Cloud platforms (AWS, Azure, GCP)
-- Databases (SQL, NoSQL, Vector DBs like Redis, Pinecone)
-- AI/ML tools (LangChain, LangGraph, CrewAI, AutoGen)
-- DevOps tools (Docker, Kubernetes, CI/CD)
-- MCP servers and agentic frameworks
-- Memory systems and caching
-- API technologies
-- Monitoring and observability tools
-
-For EACH technology, provide:
-- name: Technology name
-- description: Clear 1-2 sentence description
-- category: One of [AI/ML, Backend, Frontend, Cloud, Database, DevOps, Tools, Framework]
-- difficulty: beginner, intermediate, or advanced
-- relevance_score: 1-10 based on user interests
-- already_known: true if user already has this skill, false otherwise
-- prerequisites: List of 2-3 prerequisite skills
-- use_cases: 2-3 real-world use cases
-
-Return ONLY valid JSON array. Be comprehensive and include cutting-edge technologies.
-
-Example format:
-[
-  {{
-    "name": "LangGraph",
-    "description": "Framework for building stateful, multi-actor applications with LLMs using graph-based workflows",
-    "category": "AI/ML",
-    "difficulty": "intermediate",
-    "relevance_score": 10,
-    "already_known": false,
-    "prerequisites": ["Python", "LangChain", "Graph Theory"],
-    "use_cases": ["Multi-agent systems", "Complex AI workflows", "Stateful chatbots"]
-  }}
-]"""
-
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert tech advisor with deep knowledge of latest technologies, frameworks, and industry trends. Provide comprehensive, actionable recommendations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Extract JSON
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            suggestions = json.loads(content)
-            
-            # Mark skills user already has
-            if user_skills:
-                user_skills_lower = [s.lower() for s in user_skills]
-                for tech in suggestions:
-                    tech_name_lower = tech['name'].lower()
-                    # Exact match or very close match only
-                    tech['already_known'] = tech_name_lower in user_skills_lower or any(
-                        tech_name_lower == skill.lower() for skill in user_skills
-                    )
-            
-            return suggestions
-            
+            return await self._rerank_with_llm(interests, user_skills, suggestions)
         except Exception as e:
-            print(f"Error generating suggestions: {e}")
-            return self._get_fallback_suggestions()
+            print(f"LLM re-rank failed, using catalog ranking: {e}")
+            return suggestions
     
-    def _get_fallback_suggestions(self) -> List[Dict]:
-        """Fallback comprehensive suggestions"""
-        return [
-            {"name": "LangChain", "description": "Framework for LLM applications", "category": "AI/ML", "difficulty": "intermediate", "relevance_score": 9, "already_known": False, "prerequisites": ["Python", "APIs"], "use_cases": ["Chatbots", "RAG systems"]},
-            {"name": "LangGraph", "description": "Stateful multi-actor LLM applications", "category": "AI/ML", "difficulty": "advanced", "relevance_score": 10, "already_known": False, "prerequisites": ["LangChain", "Graph Theory"], "use_cases": ["Multi-agent systems", "Complex workflows"]},
-            {"name": "CrewAI", "description": "Framework for orchestrating AI agents", "category": "AI/ML", "difficulty": "intermediate", "relevance_score": 9, "already_known": False, "prerequisites": ["Python", "LLMs"], "use_cases": ["Agent collaboration", "Task automation"]},
-            {"name": "Redis", "description": "In-memory data store for caching and real-time apps", "category": "Database", "difficulty": "beginner", "relevance_score": 8, "already_known": False, "prerequisites": ["Databases", "Caching concepts"], "use_cases": ["Session storage", "Real-time analytics"]},
-            {"name": "AWS", "description": "Amazon Web Services cloud platform", "category": "Cloud", "difficulty": "intermediate", "relevance_score": 9, "already_known": False, "prerequisites": ["Cloud concepts", "Linux"], "use_cases": ["Hosting", "Serverless", "ML deployment"]},
-            {"name": "Azure", "description": "Microsoft cloud computing platform", "category": "Cloud", "difficulty": "intermediate", "relevance_score": 8, "already_known": False, "prerequisites": ["Cloud concepts"], "use_cases": ["Enterprise apps", "AI services"]},
-            {"name": "Docker", "description": "Containerization platform", "category": "DevOps", "difficulty": "beginner", "relevance_score": 9, "already_known": False, "prerequisites": ["Linux basics"], "use_cases": ["App deployment", "Microservices"]},
-            {"name": "Kubernetes", "description": "Container orchestration system", "category": "DevOps", "difficulty": "advanced", "relevance_score": 8, "already_known": False, "prerequisites": ["Docker", "Networking"], "use_cases": ["Scaling", "Production deployment"]},
-            {"name": "MCP Servers", "description": "Model Context Protocol for AI integrations", "category": "AI/ML", "difficulty": "intermediate", "relevance_score": 10, "already_known": False, "prerequisites": ["APIs", "LLMs"], "use_cases": ["Tool integration", "Agent systems"]},
-            {"name": "Vector Databases", "description": "Databases optimized for embeddings", "category": "Database", "difficulty": "intermediate", "relevance_score": 9, "already_known": False, "prerequisites": ["Databases", "Embeddings"], "use_cases": ["Semantic search", "RAG"]},
-            {"name": "FastAPI", "description": "Modern Python web framework", "category": "Backend", "difficulty": "beginner", "relevance_score": 8, "already_known": False, "prerequisites": ["Python", "REST APIs"], "use_cases": ["APIs", "Microservices"]},
-            {"name": "React", "description": "JavaScript library for UIs", "category": "Frontend", "difficulty": "intermediate", "relevance_score": 7, "already_known": False, "prerequisites": ["JavaScript", "HTML/CSS"], "use_cases": ["Web apps", "SPAs"]},
-        ]
+    async def _rerank_with_llm(self, interests: List[str], user_skills: List[str], suggestions: List[Dict]) -> List[Dict]:
+        """Re-order catalog suggestions using current trends; never invents new entries"""
+        # DDGS is blocking; keep it off the event loop
+        web_results = await asyncio.to_thread(self.web_search_technologies, interests)
+        web_context = "\n".join(web_results[:5]) if web_results else ""
+        user_skills_str = ", ".join(user_skills) if user_skills else "None"
+        candidates = [s["name"] for s in suggestions]
+        
+        response = await self.llm.complete(
+            "techstack_rerank",
+            messages=TECHSTACK_RERANK.messages(
+                interests=", ".join(interests),
+                user_skills_str=user_skills_str,
+                web_context=web_context,
+                candidates=json.dumps(candidates)
+            ),
+            temperature=0.2,
+            max_tokens=1000,
+            response_format={"type": "json_object"}
+        )
+        ranking = json.loads(response.choices[0].message.content.strip()).get("ranking", [])
+        
+        by_name = {s["name"]: s for s in suggestions}
+        reranked = []
+        for item in ranking:
+            suggestion = by_name.pop(item.get("name"), None)
+            if suggestion:
+                score = item.get("relevance_score")
+                if isinstance(score, int) and 1 <= score <= 10:
+                    suggestion["relevance_score"] = score
+                reranked.append(suggestion)
+        # Anything the model dropped keeps its catalog order at the end
+        return reranked + list(by_name.values())
+    
+    @staticmethod
+    def generation_cache_key(tech_stack: str, duration_days: int, skill_level: str, user_skills: List[str] = None) -> str:
+        # Cached roadmaps from an older prompt version are never returned
+        return make_key(
+            ROADMAP_GENERATE.version_hash,
+            tech_stack.strip().lower(),
+            duration_days,
+            skill_level.strip().lower(),
+            sorted(s.strip().lower() for s in user_skills or [])
+        )
     
+    @profiled("generate_roadmap")
     async def generate_roadmap(self, tech_stack: str, duration_days: int, skill_level: str, user_skills: List[str] = None) -> Dict:
         """Generate detailed DAY-BY-DAY learning roadmap with projects"""
         
+        cache_key = self.generation_cache_key(tech_stack, duration_days, skill_level, user_skills)
+        cached = self.generation_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if settings.ROADMAP_REUSE_ENABLED:
+            reused = await self._reuse_similar_roadmap(tech_stack, duration_days, skill_level)
+            if reused is not None:
+                self.generation_cache.set(cache_key, reused)
+                return reused
+        
         user_skills_context = f"\nUser already knows: {', '.join(user_skills)}" if user_skills else ""
         
-        prompt = f"""Create a detailed day-by-day learning roadmap for {tech_stack}.
-
-Duration: {duration_days} days
-User's skill level: {skill_level}{user_skills_context}
-
-IMPORTANT: Return ONLY valid JSON. Use simple descriptions without complex quotes or special characters.
-
-Create a {duration_days}-day learning plan with:
-- Daily breakdown with specific tasks
-- Hands-on exercises and projects
-- Clear learning objectives
-- Resource recommendations
-- Milestone checkpoints
-
-Return valid JSON with this structure:
-{{
-  "tech_stack": "{tech_stack}",
-  "duration_days": {duration_days},
-  "skill_level": "{skill_level}",
-  "overview": "Brief overview of what the learner will master",
-  "prerequisites": ["Prerequisite 1", "Prerequisite 2"],
-  "daily_plan": [
-    {{
-      "day": 1,
-      "title": "Day 1: Setup and Introduction",
-      "focus": "Getting started with the basics",
-      "topics": [
-        "Setting up development environment and installing required tools",
-        "Understanding core concepts and why this technology is useful",
-        "Running your first example to verify everything works"
-      ],
-      "learning_objectives": [
-        "Have a working development environment",
-        "Understand the fundamental concepts"
-      ],
-      "hands_on_tasks": [
-        "Install and configure the technology",
-        "Run a hello world example",
-        "Explore the official documentation"
-      ],
-      "practice_exercises": [
-        "Modify the example to add custom functionality",
-        "Experiment with different configurations"
-      ],
-      "resources": [
-        "Official documentation",
-        "Getting started tutorial"
-      ],
-      "estimated_hours": 3,
-      "checkpoint": "You should have the technology installed and running with a basic understanding of its purpose"
-    }}
-  ],
-  "projects": [
-    {{
-      "day_range": "Days 3-5",
-      "title": "Mini Project: Build a Simple Application",
-      "description": "Apply what you learned to create a functional project",
-      "objectives": ["Apply core concepts", "Build something real"],
-      "technologies_used": ["Tech 1", "Tech 2"],
-      "estimated_hours": 6
-    }}
-  ],
-  "capstone_project": {{
-    "title": "Final Project: Comprehensive Application",
-    "description": "Build a complete application showcasing all learned skills",
-    "features": ["Feature 1", "Feature 2", "Feature 3"],
-    "technologies": ["All technologies learned"],
-    "estimated_hours": 15,
-    "deliverables": ["Working application", "Documentation", "Deployment"]
-  }},
-  "milestones": [
-    {{
-      "day": 5,
-      "title": "Milestone 1: Fundamentals Complete",
-      "achievement": "You have mastered the basics and built your first project"
-    }}
-  ],
-  "resources": {{
-    "documentation": ["Official docs"],
-    "tutorials": ["Tutorial links"],
-    "videos": ["Video courses"],
-    "books": ["Recommended books"],
-    "communities": ["Community links"]
-  }},
-  "next_steps": [
-    "Explore advanced topics",
-    "Build more complex projects",
-    "Join the community"
-  ]
-}}
-
-Make descriptions clear and actionable. Keep it professional but encouraging."""
-
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a passionate, encouraging technical educator who makes learning exciting and approachable. Write in a warm, conversational tone that motivates learners. Explain concepts clearly with real-world context and analogies. Make technical topics feel accessible and fun! CRITICAL: Always return valid JSON with properly escaped quotes and newlines."},
-                    {"role": "user", "content": prompt}
-                ],
+            response, model = await self.llm.complete_with_model(
+                "roadmap_generate",
+                messages=ROADMAP_GENERATE.messages(
+                    tech_stack=tech_stack,
+                    duration_days=duration_days,
+                    skill_level=skill_level,
+                    user_skills_context=user_skills_context
+                ),
                 temperature=0.7,  # Reduced from 0.8 for more consistent JSON
                 max_tokens=4000,
                 response_format={"type": "json_object"}  # Force JSON mode
@@ -263,6 +157,12 @@ Make descriptions clear and actionable. Keep it professional but encouraging."""
                 content = re.sub(r',(\s*[}\]])', r'\1', content)
                 roadmap = json.loads(content)
             
+            if self.llm.is_fallback("roadmap_generate", model):
+                # Degraded answer: serve it, but let the primary model replace it soon
+                self.generation_cache.set(cache_key, roadmap, ttl=settings.ROADMAP_FALLBACK_CACHE_TTL)
+            else:
+                self.generation_cache.set(cache_key, roadmap)
+                self.similarity_index.add(roadmap)
             return roadmap
             
         except json.JSONDecodeError as e:
@@ -272,3 +172,51 @@ Make descriptions clear and actionable. Keep it professional but encouraging."""
         except Exception as e:
             print(f"Error generating roadmap: {e}")
             raise Exception(f"Failed to generate roadmap: {str(e)}")
+    
+    async def _reuse_similar_roadmap(self, tech_stack: str, duration_days: int, skill_level: str) -> Optional[Dict]:
+        """Adapt a near-duplicate roadmap to the requested duration, if one is indexed"""
+        match = self.similarity_index.find(tech_stack, skill_level, duration_days)
+        if not match:
+            return None
+        
+        source, score = match
+        print(f"Reusing roadmap for '{source.get('tech_stack')}' for '{tech_stack}' (similarity {score:.2f})")
+        roadmap = trim_roadmap(source, tech_stack, duration_days)
+        
+        missing_from = len(roadmap["daily_plan"]) + 1
+        if missing_from <= duration_days:
+            try:
+                roadmap["daily_plan"].extend(
+                    await self._extend_daily_plan(roadmap, missing_from, duration_days, skill_level)
+                )
+            except Exception as e:
+                print(f"Could not extend reused roadmap, generating from scratch: {e}")
+                return None
+        return roadmap
+    
+    async def _extend_daily_plan(self, roadmap: Dict, first_day: int, last_day: int, skill_level: str) -> List[Dict]:
+        """Cheap completion call that writes only the missing days of a reused roadmap"""
+        covered = [day.get("title", "") for day in roadmap.get("daily_plan", [])]
+        response = await self.llm.complete(
+            "roadmap_extend",
+            messages=ROADMAP_EXTEND.messages(
+                skill_level=skill_level,
+                tech_stack=roadmap["tech_stack"],
+                covered=json.dumps(covered),
+                first_day=first_day,
+                last_day=last_day
+            ),
+            temperature=0.5,
+            max_tokens=min(4000, 300 * (last_day - first_day + 1)),
+            response_format={"type": "json_object"}
+        )
+        days = json.loads(response.choices[0].message.content.strip()).get("daily_plan", [])
+        # Keep the first entry for each requested day; a gap means the answer is unusable
+        by_day = {}
+        for day in days:
+            if isinstance(day, dict) and isinstance(day.get("day"), int) and first_day <= day["day"] <= last_day:
+                by_day.setdefault(day["day"], day)
+        missing = [n for n in range(first_day, last_day + 1) if n not in by_day]
+        if missing:
+            raise ValueError(f"extension is missing days {missing[:5]}")
+        return [by_day[n] for n in range(first_day, last_day + 1)]
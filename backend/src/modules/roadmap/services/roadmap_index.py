@@ -0,0 +1,181 @@
+import copy
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Suffixes that don't change which technology is meant ("React.js" == "React")
+_JS_SUFFIX = re.compile(r"(?:\s*\.?\s*js)$")
+_NON_ALNUM = re.compile(r"[^a-z0-9+#]+")
+_SPACES_DOTS = re.compile(r"[\s.]+")
+
+# ...except where the suffix names a different technology: AngularJS (1.x)
+# is not Angular. Keyed by the name without spaces and dots; keep in sync
+# with normalize_skill() in skill-analytics.sql
+_JS_SUFFIX_EXCEPTIONS = {
+    "angularjs": "angularjs",
+}
+
+
+def normalize_stack_name(name: str) -> str:
+    """Canonical form of a tech stack name for similarity matching
+
+    >>> [normalize_stack_name(n) for n in ("React.js", "ReactJS", "React")]
+    ['react', 'react', 'react']
+    >>> [normalize_stack_name(n) for n in ("AngularJS", "Angular.js", "Angular")]
+    ['angularjs', 'angularjs', 'angular']
+    """
+    value = (name or "").strip().lower()
+    exception = _JS_SUFFIX_EXCEPTIONS.get(_SPACES_DOTS.sub("", value))
+    if exception:
+        return exception
+    value = _JS_SUFFIX.sub("", value) or value
+    value = _NON_ALNUM.sub(" ", value)
+    return " ".join(value.split())
+
+
+def _trigrams(text: str) -> Counter:
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _first_day(day_range: str) -> Optional[int]:
+    numbers = re.findall(r"\d+", day_range or "")
+    return int(numbers[0]) if numbers else None
+
+
+def trim_roadmap(roadmap: Dict, tech_stack: str, duration_days: int) -> Dict:
+    """Cut a longer roadmap down to `duration_days`, keeping only items inside the window"""
+    trimmed = copy.deepcopy(roadmap)
+    original_days = roadmap.get("duration_days") or len(roadmap.get("daily_plan", []))
+    if isinstance(original_days, int) and duration_days < original_days:
+        # Both describe the end state of the longer plan
+        trimmed.pop("overview", None)
+        trimmed.pop("capstone_project", None)
+    trimmed["tech_stack"] = tech_stack
+    trimmed["duration_days"] = duration_days
+    trimmed["daily_plan"] = [
+        day for day in trimmed.get("daily_plan", [])
+        if isinstance(day.get("day"), int) and day["day"] <= duration_days
+    ]
+    trimmed["projects"] = [
+        project for project in trimmed.get("projects", [])
+        if (_first_day(project.get("day_range", "")) or 0) <= duration_days
+    ]
+    trimmed["milestones"] = [
+        milestone for milestone in trimmed.get("milestones", [])
+        if isinstance(milestone.get("day"), int) and milestone["day"] <= duration_days
+    ]
+    return trimmed
+
+
+class RoadmapSimilarityIndex:
+    """Character-trigram TF-IDF index over previously generated roadmaps.
+
+    Lets "ReactJS", "React.js" and "React" at nearby durations share one
+    generated plan instead of each costing a full LLM call. Matching requires
+    the same skill level; name similarity must reach `threshold`.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_extend_days: int,
+        max_entries: int,
+        loader: Optional[Callable[[], List[Dict]]] = None
+    ):
+        self.threshold = threshold
+        self.max_extend_days = max_extend_days
+        self.max_entries = max_entries
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._loaded = loader is None
+        # (normalized name, skill level, duration) -> roadmap, newest last
+        self._entries: "OrderedDict[Tuple[str, str, int], Dict]" = OrderedDict()
+        self._vectors: Dict[str, Dict[str, float]] = {}
+        self._idf: Dict[str, float] = {}
+        self._dirty = True
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, roadmap: Dict) -> None:
+        """Index a generated roadmap (ignored if it lacks the fields used for matching)"""
+        name = normalize_stack_name(roadmap.get("tech_stack", ""))
+        level = str(roadmap.get("skill_level", "")).strip().lower()
+        duration = roadmap.get("duration_days") or len(roadmap.get("daily_plan", []))
+        if not name or not level or not isinstance(duration, int) or not roadmap.get("daily_plan"):
+            return
+        with self._lock:
+            key = (name, level, duration)
+            self._entries.pop(key, None)
+            self._entries[key] = roadmap
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            rows = self.loader()
+            # Oldest first so the newest plan wins for identical keys
+            for roadmap in reversed(rows):
+                self.add(roadmap)
+            print(f"Roadmap similarity index warmed with {len(self._entries)} roadmaps")
+        except Exception as e:
+            print(f"Could not warm roadmap similarity index: {e}")
+
+    def _rebuild(self) -> None:
+        names = {key[0] for key in self._entries}
+        document_frequency = Counter()
+        grams = {name: _trigrams(name) for name in names}
+        for counts in grams.values():
+            document_frequency.update(counts.keys())
+        total = len(names)
+        self._idf = {gram: math.log((1 + total) / (1 + df)) + 1.0 for gram, df in document_frequency.items()}
+        self._vectors = {name: self._weigh(counts) for name, counts in grams.items()}
+        self._dirty = False
+
+    def _weigh(self, counts: Counter) -> Dict[str, float]:
+        # Unseen trigrams get the maximum idf
+        default_idf = math.log(1 + len(self._vectors) + 1) + 1.0
+        vector = {gram: count * self._idf.get(gram, default_idf) for gram, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {gram: w / norm for gram, w in vector.items()}
+
+    def find(self, tech_stack: str, skill_level: str, duration_days: int) -> Optional[Tuple[Dict, float]]:
+        """Best reusable roadmap as (roadmap, similarity), or None"""
+        self._ensure_loaded()
+        name = normalize_stack_name(tech_stack)
+        level = skill_level.strip().lower()
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            query = self._weigh(_trigrams(name))
+            best = None
+            best_rank = None
+            for (entry_name, entry_level, entry_duration), roadmap in self._entries.items():
+                if entry_level != level:
+                    continue
+                # Only slightly different durations: trimming a much longer plan
+                # leaves a truncated curriculum, not a shorter one
+                if abs(entry_duration - duration_days) > self.max_extend_days:
+                    continue
+                vector = self._vectors[entry_name]
+                score = sum(w * vector.get(gram, 0.0) for gram, w in query.items())
+                if score < self.threshold:
+                    continue
+                # Most similar first, then the closest duration (trimming beats extending)
+                rank = (round(score, 3), -abs(entry_duration - duration_days), entry_duration >= duration_days)
+                if best_rank is None or rank > best_rank:
+                    best, best_rank = (roadmap, score), rank
+        if best:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return best
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
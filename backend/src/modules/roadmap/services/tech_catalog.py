@@ -0,0 +1,118 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from .roadmap_index import normalize_stack_name
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+# Field weights: a match on the name or a tag says more than one in the prose
+_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "aliases": 3.0,
+    "tags": 2.0,
+    "category": 1.0,
+    "use_cases": 1.0,
+    "description": 1.0,
+}
+
+
+def _terms(text: str) -> List[str]:
+    """Words plus adjacent-word bigrams ("machine learning" stays a unit)"""
+    words = _WORD.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _field_text(entry: Dict, field: str) -> Iterable[str]:
+    value = entry.get(field) or []
+    return [value] if isinstance(value, str) else value
+
+
+class TechCatalog:
+    """Versioned local technology catalog with TF-IDF ranking.
+
+    The term matrix is built once at load; ranking a request is one
+    matrix-vector product, so suggestions take milliseconds and need no LLM.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or os.path.join(os.path.dirname(__file__), '..', 'catalog_data', 'tech_catalog.json')
+        with open(path, "r") as f:
+            catalog = json.load(f)
+
+        self.version = catalog["version"]
+        self.entries: List[Dict] = catalog["technologies"]
+
+        weighted_terms = []
+        for entry in self.entries:
+            counts: Dict[str, float] = {}
+            for field, weight in _FIELD_WEIGHTS.items():
+                for text in _field_text(entry, field):
+                    for term in _terms(text):
+                        counts[term] = counts.get(term, 0.0) + weight
+            weighted_terms.append(counts)
+
+        self.vocabulary = {term: i for i, term in enumerate(sorted({t for c in weighted_terms for t in c}))}
+        counts_matrix = np.zeros((len(self.entries), len(self.vocabulary)), dtype=np.float32)
+        for row, counts in enumerate(weighted_terms):
+            for term, count in counts.items():
+                counts_matrix[row, self.vocabulary[term]] = count
+
+        document_frequency = (counts_matrix > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(self.entries)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+        matrix = np.log1p(counts_matrix) * self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+        self._known_names = [
+            {normalize_stack_name(entry["name"])} | {normalize_stack_name(a) for a in entry.get("aliases", [])}
+            for entry in self.entries
+        ]
+        self._prerequisites = [
+            [normalize_stack_name(p) for p in entry.get("prerequisites", [])]
+            for entry in self.entries
+        ]
+        print(f"Tech catalog {self.version} loaded ({len(self.entries)} technologies)")
+
+    def _query_vector(self, interests: List[str]) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for interest in interests:
+            for term in _terms(interest):
+                index = self.vocabulary.get(term)
+                if index is not None:
+                    vector[index] += 1.0
+        vector = np.log1p(vector) * self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def rank(self, interests: List[str], user_skills: List[str] = None, top_k: int = 20) -> List[Dict]:
+        """Catalog entries ordered by relevance to interests, in the suggestion format"""
+        skills = {normalize_stack_name(s) for s in user_skills or []}
+
+        similarity = self.matrix @ self._query_vector(interests)
+        already_known = np.array([bool(names & skills) for names in self._known_names])
+        readiness = np.array([
+            sum(p in skills for p in prereqs) / len(prereqs) if prereqs else 1.0
+            for prereqs in self._prerequisites
+        ], dtype=np.float32)
+
+        # Prefer things the user is ready for; push what they already know down
+        score = similarity * (1.0 + 0.2 * readiness) * np.where(already_known, 0.5, 1.0)
+        order = np.argsort(-score, kind="stable")[:top_k]
+
+        top = float(similarity.max()) or 1.0
+        suggestions = []
+        for i in order:
+            entry = self.entries[i]
+            suggestions.append({
+                "name": entry["name"],
+                "description": entry["description"],
+                "category": entry["category"],
+                "difficulty": entry["difficulty"],
+                "relevance_score": int(round(1 + 9 * float(similarity[i]) / top)),
+                "already_known": bool(already_known[i]),
+                "prerequisites": entry["prerequisites"],
+                "use_cases": entry["use_cases"],
+            })
+        return suggestions
@@ -0,0 +1,3 @@
+from .cache import Cache, get_cache, cache_stats, make_key
+
+__all__ = ['Cache', 'get_cache', 'cache_stats', 'make_key']
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from ..database.local_store import LocalSQLite
+
+
+class MemoryBackend:
+    """Per-process LRU bounded by entry count and total value bytes"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, expires: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (value, expires)
+            self._bytes += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for key in keys:
+                self._pop(key)
+            return len(keys)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _pop(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+
+class SQLiteBackend:
+    """Host-wide tier: one SQLite file shared by every worker process.
+
+    Entries are trimmed oldest-first once the table grows past max_entries.
+    """
+
+    _TRIM_EVERY = 64
+
+    def __init__(self, path: str, max_entries: int):
+        self.db = LocalSQLite(path)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        conn = self.db.conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, stored REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_stored ON cache_entries(stored)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self.db.conn().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, expires: float) -> None:
+        conn = self.db.conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires, stored) VALUES (?, ?, ?, ?)",
+            (key, value, expires, time.time())
+        )
+        self._writes += 1
+        if self._writes % self._TRIM_EVERY == 0:
+            self._trim(conn)
+
+    def delete(self, key: str) -> None:
+        self.db.conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> int:
+        # Range scan on the primary key instead of LIKE (no escaping, uses the index)
+        cursor = self.db.conn().execute(
+            "DELETE FROM cache_entries WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+        )
+        return cursor.rowcount
+
+    def size(self) -> int:
+        (count,) = self.db.conn().execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        return count
+
+    def _trim(self, conn) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires < ?", (time.time(),))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY stored LIMIT ?)", (excess,)
+            )
+            self.evictions += excess
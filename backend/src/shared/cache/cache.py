@@ -0,0 +1,96 @@
+import hashlib
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from ..config.settings import settings
+from ..utils.json_response import dumps, loads
+from .backends import MemoryBackend, SQLiteBackend
+
+
+@lru_cache()
+def get_cache_backend():
+    """Shared SQLite tier when SHARED_CACHE_PATH is set, per-process memory otherwise"""
+    if settings.SHARED_CACHE_PATH:
+        return SQLiteBackend(settings.SHARED_CACHE_PATH, settings.CACHE_MAX_ENTRIES)
+    return MemoryBackend(settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES)
+
+
+def make_key(*parts: Any) -> str:
+    """Stable short key for arbitrary JSON-serializable parts"""
+    return hashlib.sha256(dumps(parts)).hexdigest()[:32]
+
+
+class Cache:
+    """Namespaced JSON cache over the configured backend.
+
+    Values are stored serialized, so callers always get a private copy and the
+    same entries are readable from every worker when the SQLite tier is on.
+    """
+
+    def __init__(self, namespace: str, backend, ttl: int):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.invalidations = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.backend.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return loads(raw)
+
+    def contains(self, key: str) -> bool:
+        """Existence check that doesn't count as a hit or miss"""
+        return self.backend.get(self._key(key)) is not None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires = time.time() + (ttl if ttl is not None else self.ttl)
+        self.backend.set(self._key(key), dumps(value), expires)
+        self.sets += 1
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(self._key(key))
+        self.invalidations += 1
+
+    def delete_prefix(self, prefix: str) -> None:
+        self.backend.delete_prefix(self._key(prefix))
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "sets": self.sets,
+            "invalidations": self.invalidations,
+        }
+
+
+_caches: Dict[str, Cache] = {}
+
+
+def get_cache(namespace: str, ttl: int) -> Cache:
+    """Get (or create) the process-wide cache for a namespace"""
+    if namespace not in _caches:
+        _caches[namespace] = Cache(namespace, get_cache_backend(), ttl)
+    return _caches[namespace]
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters for every namespace plus backend size/evictions"""
+    backend = get_cache_backend()
+    return {
+        "backend": type(backend).__name__,
+        "entries": backend.size(),
+        "evictions": backend.evictions,
+        "namespaces": {name: cache.stats() for name, cache in _caches.items()},
+    }
@@ -1,3 +1,3 @@
-from .settings import settings, get_settings
+from .settings import settings, get_settings, use_shared_state
 
-__all__ = ['settings', 'get_settings']
+__all__ = ['settings', 'get_settings', 'use_shared_state']
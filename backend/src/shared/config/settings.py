@@ -1,6 +1,8 @@
+import os
+import tempfile
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # Supabase
@@ -9,10 +11,48 @@ class Settings(BaseSettings):
     
     # Groq AI
     GROQ_API_KEY: str
+    GROQ_BASE_URL: Optional[str] = None  # e.g. a local OpenAI-compatible stand-in for testing
+    
+    # LLM call policy
+    LLM_PRIMARY_MODEL: str = "llama-3.3-70b-versatile"
+    LLM_FAST_MODEL: str = "llama-3.1-8b-instant"  # cheap tasks first, and the fallback for the rest
+    LLM_DEADLINES: Dict[str, float] = {  # seconds per call site, fallbacks included
+        "resume_structure": 30.0,
+        "roadmap_generate": 60.0,
+        "roadmap_extend": 20.0,
+        "techstack_rerank": 8.0,
+    }
+    LLM_FALLBACK_RESERVES: Dict[str, float] = {  # seconds of each deadline kept back for the fallback model
+        "resume_structure": 8.0,
+        "roadmap_generate": 15.0,
+        "roadmap_extend": 6.0,
+        "techstack_rerank": 3.0,
+    }
+    LLM_HEDGE_ENABLED: bool = True  # duplicate a request once it runs past the observed p95
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # latencies needed before hedging starts
+    LLM_HEDGE_RATE: float = 0.1  # hedges allowed per call, on average
+    LLM_HEDGE_BURST: float = 5.0  # hedges that can be spent back to back
+    LLM_LATENCY_WINDOW: int = 200  # recent latencies kept per call site and model
     
     # Server
     API_PORT: int = 8000
     API_HOST: str = "0.0.0.0"
+    SERVER_MODE: str = "development"  # development (single process, reload) | production
+    WORKERS: int = 4  # production worker processes
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30  # seconds to drain in-flight requests
+    
+    # Caching
+    SHARED_CACHE_PATH: Optional[str] = None  # SQLite file shared by workers; None = per-process memory
+    CACHE_MAX_ENTRIES: int = 5000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # memory backend only
+    RESUME_PARSE_CACHE_TTL: int = 7 * 24 * 3600
+    ROADMAP_GENERATION_CACHE_TTL: int = 7 * 24 * 3600
+    ROADMAP_FALLBACK_CACHE_TTL: int = 3600  # roadmaps written by the fallback model
+    WEB_SEARCH_CACHE_TTL: int = 24 * 3600
+    # Safety net for rows written outside the API (the frontend writes resumes directly)
+    DB_READ_CACHE_TTL: int = 300
+    # Roadmap bodies are immutable (content-addressed), so they can stay cached long
+    ROADMAP_BODY_CACHE_TTL: int = 7 * 24 * 3600
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -21,6 +61,79 @@ class Settings(BaseSettings):
         "http://localhost:3001"   # User's current port
     ]
     
+    # Resume text extraction
+    EXTRACTION_CHAR_BUDGET: int = 20000  # stop reading pages once this much text is collected
+    PDF_PAGE_MIN_TEXT_CHARS: int = 40  # pages with less text than this are OCR'd
+    PDF_PAGE_OCR_IMAGE_COVERAGE: float = 0.5  # ...as are pages this much covered by images
+    PDF_PAGE_MIN_TEXT_COVERAGE: float = 0.15  # ...whose text blocks cover less than this
+    OCR_DPI: int = 150
+    
+    # Tech stack suggestions
+    TECHSTACK_SUGGESTION_COUNT: int = 20
+    TECHSTACK_LLM_RERANK: bool = False  # re-rank catalog results with the LLM + web search
+    
+    # Speculative roadmap pre-generation after suggestions
+    PREFETCH_ENABLED: bool = False
+    PREFETCH_TOP_K: int = 2  # suggestions to pre-generate
+    PREFETCH_DURATIONS: List[int] = [30]  # most commonly requested durations
+    PREFETCH_SKILL_LEVEL: str = "beginner"
+    PREFETCH_MAX_PER_HOUR: int = 20  # hard cap on speculative LLM calls
+    PREFETCH_MAX_QUEUE: int = 10
+    PREFETCH_IDLE_POLL: float = 1.0  # seconds between checks for interactive load
+    
+    # Near-duplicate roadmap reuse
+    ROADMAP_REUSE_ENABLED: bool = True
+    ROADMAP_REUSE_THRESHOLD: float = 0.85  # name similarity (0-1) needed to reuse a roadmap
+    ROADMAP_REUSE_MAX_EXTEND_DAYS: int = 7  # largest duration difference reused (extended or trimmed)
+    ROADMAP_INDEX_MAX_ENTRIES: int = 2000
+    ROADMAP_INDEX_WARM_ROWS: int = 200  # learning_roadmaps rows loaded on first use
+    
+    # HTTP caching / compression
+    HTTP_CACHE_MAX_AGE: int = 0  # seconds; 0 = always revalidate with ETag
+    HTTP_COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    HTTP_BROTLI_QUALITY: int = 4
+    
+    # Admission control for LLM-bound endpoints
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_STORE_PATH: Optional[str] = None  # SQLite file shared by workers; None = in-process
+    ADMISSION_MAX_IN_FLIGHT: Dict[str, int] = {
+        "resume_parse": 4,
+        "roadmap_generate": 4,
+        "techstack_suggest": 8
+    }
+    ADMISSION_MAX_QUEUE: int = 16  # waiting requests per endpoint class
+    ADMISSION_QUEUE_TIMEOUT: float = 10.0  # seconds
+    ADMISSION_USER_RATE_PER_MINUTE: float = 6.0
+    ADMISSION_USER_BURST: int = 3
+    ADMISSION_RETRY_AFTER: int = 5  # seconds, when rejected for capacity
+    ADMISSION_LEASE_TTL: float = 300.0  # seconds before an orphaned slot is reclaimed
+    
+    # Bulk NDJSON export
+    EXPORT_PAGE_SIZE: int = 500  # rows fetched per keyset page
+    EXPORT_ADMIN_TOKEN: Optional[str] = None  # X-Export-Token for exports across all users; None = disabled
+    
+    # Opt-in profiling (cProfile + tracemalloc around hot paths)
+    PROFILING_ENABLED: bool = False  # off: decorators return functions unchanged
+    PROFILING_TOKEN: Optional[str] = None  # X-Profile header value that opts a request in
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of requests profiled without the header
+    PROFILE_DIR: str = os.path.join(tempfile.gettempdir(), "futureproof", "profiles")
+    PROFILE_MAX_FILES: int = 50  # oldest captures are deleted beyond this
+    PROFILE_TRACEMALLOC_FRAMES: int = 10
+    
+    # Background domain events
+    EVENT_MAX_ATTEMPTS: int = 5
+    EVENT_RETRY_BASE_DELAY: float = 1.0  # seconds, doubled per retry
+    
+    # Live updates (Server-Sent Events)
+    SSE_HEARTBEAT_SECONDS: float = 15.0  # comment line sent on idle streams
+    SSE_RETRY_MS: int = 3000  # client reconnect delay
+    SSE_QUEUE_SIZE: int = 100  # per connection; a client further behind is told to resync
+    SSE_REPLAY_SIZE: int = 50  # recent messages per user replayed on reconnect
+    # SQLite file shared by workers so every worker sees every update; None = in-process only
+    BROADCAST_STORE_PATH: Optional[str] = None
+    BROADCAST_POLL_INTERVAL: float = 0.25  # seconds between checks of the shared table
+    BROADCAST_RETENTION: float = 300.0  # seconds messages stay available for replay
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -30,3 +143,17 @@ def get_settings():
     return Settings()
 
 settings = get_settings()
+
+def use_shared_state() -> None:
+    """Point the cache, admission and broadcast stores at one host-local SQLite file.
+
+    Called by the production entry points before workers start; exported to
+    the environment too, so spawned (not forked) workers pick it up.
+    """
+    default_path = os.path.join(tempfile.gettempdir(), "futureproof", "shared-state.sqlite3")
+    settings.SHARED_CACHE_PATH = settings.SHARED_CACHE_PATH or default_path
+    settings.ADMISSION_STORE_PATH = settings.ADMISSION_STORE_PATH or default_path
+    settings.BROADCAST_STORE_PATH = settings.BROADCAST_STORE_PATH or default_path
+    os.environ["SHARED_CACHE_PATH"] = settings.SHARED_CACHE_PATH
+    os.environ["ADMISSION_STORE_PATH"] = settings.ADMISSION_STORE_PATH
+    os.environ["BROADCAST_STORE_PATH"] = settings.BROADCAST_STORE_PATH
@@ -1,3 +1,5 @@
 from .supabase import get_supabase_client, get_db
+from .local_store import LocalSQLite
+from .export import iter_keyset, project
 
-__all__ = ['get_supabase_client', 'get_db']
+__all__ = ['get_supabase_client', 'get_db', 'LocalSQLite', 'iter_keyset', 'project']
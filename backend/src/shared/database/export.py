@@ -0,0 +1,48 @@
+from typing import Dict, Iterator, List, Optional, Sequence
+from supabase import Client
+
+# Cursor columns: (created_at, id) is unique and covered by the export indexes
+CURSOR_COLUMNS = ("created_at", "id")
+
+
+def _quote(value: str) -> str:
+    # Timestamps contain '.', ':' and '+', which PostgREST reserves inside or=()
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+
+def iter_keyset(
+    client: Client,
+    table: str,
+    columns: Sequence[str],
+    page_size: int,
+    filters: Optional[Dict[str, str]] = None
+) -> Iterator[Dict]:
+    """Yield every matching row in (created_at, id) order, one page at a time.
+
+    Each page continues strictly after the last row of the previous one, so
+    the database does an index range scan per page instead of an ever-growing
+    OFFSET, and only one page is held in memory. Rows inserted during the
+    export show up at the end rather than shifting pages.
+    """
+    select = ",".join(dict.fromkeys([*columns, *CURSOR_COLUMNS]))
+    last: Optional[Dict] = None
+    while True:
+        query = client.table(table).select(select)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        if last is not None:
+            created_at, row_id = _quote(last["created_at"]), _quote(last["id"])
+            query = query.or_(f"created_at.gt.{created_at},and(created_at.eq.{created_at},id.gt.{row_id})")
+        rows: List[Dict] = query.order("created_at").order("id").limit(page_size).execute().data or []
+
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+
+
+def project(rows: Iterator[Dict], fields: Sequence[str]) -> Iterator[Dict]:
+    """Drop the cursor columns from rows when the caller didn't ask for them"""
+    for row in rows:
+        yield {field: row.get(field) for field in fields}
@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import threading
+
+
+class LocalSQLite:
+    """Host-local SQLite file usable from every thread and worker process.
+
+    Connections are opened lazily per thread and re-opened after a fork, so an
+    instance created while the app is being preloaded is safe to use in the
+    forked workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,4 @@
+from .bus import Event, EventBus, get_event_bus
+from .broadcast import Broadcaster, RESYNC_EVENT, get_broadcaster, sse_response
+
+__all__ = ['Event', 'EventBus', 'get_event_bus', 'Broadcaster', 'RESYNC_EVENT', 'get_broadcaster', 'sse_response']
@@ -0,0 +1,334 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+from ..config.settings import settings
+from ..database.local_store import LocalSQLite
+from ..utils.json_response import dumps
+
+# Sent instead of the missed deltas when a client can't be caught up
+# (replay history exhausted, server restarted, or the client fell behind);
+# the client should refetch its state
+RESYNC_EVENT = "resync"
+
+
+@dataclass
+class Message:
+    id: str
+    channel: str
+    event: str
+    data: bytes  # JSON, encoded once at publish time and shared by every subscriber
+
+
+class Broadcaster:
+    """Fan-out pub/sub for live updates pushed to SSE clients.
+
+    Unlike the EventBus (a work queue: each event is handled once), every
+    subscriber of a channel receives every message. Each subscriber has a
+    bounded queue; one that falls behind gets a single `resync` message
+    instead of blocking publishers. Recent messages are kept per channel so a
+    reconnecting client can resume from its Last-Event-ID; a channel with no
+    subscribers and no messages for `retention` seconds forgets its history.
+
+    With a store path, messages go through a host-local SQLite table that
+    every worker polls, so a client connected to one worker sees updates
+    made through another.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 100,
+        replay_size: int = 50,
+        store_path: Optional[str] = None,
+        poll_interval: float = 0.25,
+        retention: float = 300.0
+    ):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._history: Dict[str, Deque[Message]] = {}
+        # Highest sequence number evicted from each channel's history
+        self._evicted: Dict[str, int] = {}
+        # Last publish or unsubscribe per channel, for dropping idle histories
+        self._active: Dict[str, float] = {}
+        # Highest sequence number in any history dropped as idle
+        self._pruned = 0
+        # Last idle-history sweep (memory) or DELETE of expired rows (SQLite)
+        self._last_prune = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poller: Optional[asyncio.Task] = None
+        self.db = LocalSQLite(store_path) if store_path else None
+        if self.db:
+            self.db.conn().execute(
+                "CREATE TABLE IF NOT EXISTS broadcast_messages "
+                "(seq INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, event TEXT NOT NULL, "
+                "data BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            # Ids from the shared table stay meaningful across workers and restarts
+            self._epoch = "s"
+            self._last_seq = 0
+        else:
+            self._epoch = uuid.uuid4().hex[:8]
+            self._sequence = itertools.count(1)
+        self.stats = {"published": 0, "delivered": 0, "subscribers": 0, "replayed": 0, "resyncs": 0}
+
+    def _message_id(self, seq: int) -> str:
+        return f"{self._epoch}-{seq}"
+
+    def _parse_id(self, message_id: Optional[str]) -> Optional[int]:
+        """Sequence number of a Last-Event-ID issued by this broadcaster, else None"""
+        epoch, _, seq = (message_id or "").partition("-")
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def publish(self, channel: str, event: str, payload: Dict) -> None:
+        """Send a delta to every subscriber of a channel; safe from any thread"""
+        data = dumps(payload)
+        if self.db:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not None:
+                # The insert can wait on another worker's write lock
+                running.run_in_executor(None, self._insert, channel, event, data)
+            else:
+                self._insert(channel, event, data)
+            return
+
+        if self._loop is None:
+            # No event loop running (e.g. a script): nobody can be listening
+            return
+        message = Message(self._message_id(next(self._sequence)), channel, event, data)
+        self.stats["published"] += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fan_out(message)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, message)
+
+    def _insert(self, channel: str, event: str, data: bytes) -> None:
+        try:
+            self.db.conn().execute(
+                "INSERT INTO broadcast_messages (channel, event, data, created) VALUES (?, ?, ?, ?)",
+                (channel, event, data, time.time())
+            )
+            self.stats["published"] += 1
+        except Exception as e:
+            # Live updates are best effort; clients resync on reconnect
+            print(f"Broadcast publish failed on {channel}: {e}")
+
+    def _fan_out(self, message: Message) -> None:
+        now = time.monotonic()
+        if now - self._last_prune >= self.retention:
+            self._prune(now)
+        self._active[message.channel] = now
+        history = self._history.setdefault(message.channel, deque())
+        history.append(message)
+        while len(history) > self.replay_size:
+            self._evicted[message.channel] = self._parse_id(history.popleft().id)
+
+        for queue in self._subscribers.get(message.channel, ()):
+            self._offer(queue, message)
+
+    def _prune(self, now: float) -> None:
+        """Drop the history of channels idle for longer than retention"""
+        self._last_prune = now
+        idle = [
+            channel for channel, active in self._active.items()
+            if now - active > self.retention and channel not in self._subscribers
+        ]
+        for channel in idle:
+            history = self._history.pop(channel, None)
+            if history:
+                self._pruned = max(self._pruned, self._parse_id(history[-1].id))
+            self._evicted.pop(channel, None)
+            del self._active[channel]
+
+    def _offer(self, queue: asyncio.Queue, message: Message) -> None:
+        try:
+            queue.put_nowait(message)
+            self.stats["delivered"] += 1
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop its backlog and ask it to refetch
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self._resync(message.channel))
+
+    def _resync(self, channel: str) -> Message:
+        self.stats["resyncs"] += 1
+        return Message("", channel, RESYNC_EVENT, b"{}")
+
+    def _read_missed(self, channel: str, last_seq: int, up_to: int) -> Optional[List[Tuple[int, str, bytes]]]:
+        """Stored rows for a channel after last_seq, or None if some were already pruned"""
+        conn = self.db.conn()
+        (oldest,) = conn.execute("SELECT MIN(seq) FROM broadcast_messages").fetchone()
+        if oldest is not None and last_seq < oldest - 1:
+            return None
+        return conn.execute(
+            "SELECT seq, event, data FROM broadcast_messages WHERE channel = ? AND seq > ? AND seq <= ? "
+            "ORDER BY seq LIMIT ?",
+            (channel, last_seq, up_to, self.replay_size + 1)
+        ).fetchall()
+
+    async def _replay(self, channel: str, last_event_id: Optional[str]) -> List[Message]:
+        """Messages published after last_event_id, or a single resync if some were lost"""
+        last_seq = self._parse_id(last_event_id)
+        if last_seq is None:
+            return [self._resync(channel)]
+
+        if self.db:
+            rows = await asyncio.to_thread(self._read_missed, channel, last_seq, self._last_seq)
+            if rows is None:
+                return [self._resync(channel)]
+            missed = [Message(self._message_id(seq), channel, event, data) for seq, event, data in rows]
+        else:
+            # A dropped idle channel may have held messages the client missed
+            floor = self._evicted.get(channel, 0) if channel in self._history else self._pruned
+            if last_seq < floor:
+                return [self._resync(channel)]
+            missed = [m for m in self._history.get(channel, ()) if self._parse_id(m.id) > last_seq]
+
+        if len(missed) > self.replay_size:
+            return [self._resync(channel)]
+        self.stats["replayed"] += len(missed)
+        return missed
+
+    async def subscribe(self, channel: str, last_event_id: Optional[str] = None) -> AsyncIterator[Message]:
+        """Yield messages for a channel until the consumer stops iterating.
+
+        With last_event_id (the SSE Last-Event-ID header), anything published
+        since is replayed first.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        self.stats["subscribers"] += 1
+        try:
+            # Skip anything the client already has (it may have seen further
+            # ahead on another worker)
+            floor = self._parse_id(last_event_id) or 0
+            if last_event_id:
+                for message in await self._replay(channel, last_event_id):
+                    yield message
+            while True:
+                message = await queue.get()
+                if message.id and self._parse_id(message.id) <= floor:
+                    continue
+                yield message
+        finally:
+            self.stats["subscribers"] -= 1
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+                    if channel in self._history:
+                        self._active[channel] = time.monotonic()
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self.db:
+            # Only messages published from now on are pushed live
+            (self._last_seq,) = await asyncio.to_thread(
+                lambda: self.db.conn().execute("SELECT COALESCE(MAX(seq), 0) FROM broadcast_messages").fetchone()
+            )
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        self._loop = None
+
+    def _read_new(self) -> List[Tuple[int, str, str, bytes]]:
+        conn = self.db.conn()
+        # Pruning takes the write lock shared with the cache and admission
+        # store, so do it on a slow timer rather than every poll
+        now = time.monotonic()
+        if now - self._last_prune >= self.retention / 10:
+            self._last_prune = now
+            conn.execute("DELETE FROM broadcast_messages WHERE created < ?", (time.time() - self.retention,))
+        return conn.execute(
+            "SELECT seq, channel, event, data FROM broadcast_messages WHERE seq > ? ORDER BY seq",
+            (self._last_seq,)
+        ).fetchall()
+
+    async def _poll(self) -> None:
+        """Fan out rows written by any worker (this one included)"""
+        while True:
+            try:
+                for seq, channel, event, data in await asyncio.to_thread(self._read_new):
+                    self._last_seq = seq
+                    message = Message(self._message_id(seq), channel, event, data)
+                    for queue in self._subscribers.get(channel, ()):
+                        self._offer(queue, message)
+            except Exception as e:
+                print(f"Broadcast poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def metrics(self) -> Dict:
+        return {**self.stats, "channels": len(self._subscribers), "shared": self.db is not None}
+
+
+@lru_cache()
+def get_broadcaster() -> Broadcaster:
+    """Get the process-wide live update broadcaster"""
+    return Broadcaster(
+        queue_size=settings.SSE_QUEUE_SIZE,
+        replay_size=settings.SSE_REPLAY_SIZE,
+        store_path=settings.BROADCAST_STORE_PATH,
+        poll_interval=settings.BROADCAST_POLL_INTERVAL,
+        retention=settings.BROADCAST_RETENTION
+    )
+
+
+async def _sse_frames(broadcaster: Broadcaster, channel: str, last_event_id: Optional[str], heartbeat: float) -> AsyncIterator[bytes]:
+    # Clients wait this long before reconnecting after the stream drops
+    yield f"retry: {int(settings.SSE_RETRY_MS)}\n\n".encode()
+    messages = broadcaster.subscribe(channel, last_event_id)
+    pending: Optional[asyncio.Task] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(messages.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+            if not done:
+                # Comment line keeps proxies and load balancers from timing out the stream
+                yield b": keep-alive\n\n"
+                continue
+            message = pending.result()
+            pending = None
+            head = f"id: {message.id}\n" if message.id else ""
+            yield f"{head}event: {message.event}\ndata: ".encode() + message.data + b"\n\n"
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await messages.aclose()
+
+
+def sse_response(channel: str, last_event_id: Optional[str] = None) -> StreamingResponse:
+    """Stream a channel's messages as Server-Sent Events, with heartbeats"""
+    return StreamingResponse(
+        _sse_frames(get_broadcaster(), channel, last_event_id, settings.SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -0,0 +1,165 @@
+import asyncio
+import inspect
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+from ..config.settings import settings
+
+
+@dataclass
+class Event:
+    type: str
+    payload: Dict[str, Any]
+    # Deterministic ids make publishing idempotent: a duplicate of an event
+    # that is still queued or awaiting retry is dropped. Handled events are
+    # not remembered, so handlers must tolerate seeing the same event again
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+
+
+class EventBus:
+    """In-process domain event queue drained by a background consumer task.
+
+    Handlers run after the publishing request has returned. Sync handlers are
+    run in a worker thread so blocking database calls don't stall the loop.
+    Failed handlers are retried with exponential backoff.
+    """
+
+    def __init__(self, max_attempts: int = 5, retry_base_delay: float = 1.0):
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self._handlers: Dict[str, List[Callable]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._pending: set = set()
+        # Events waiting on their backoff timer: id -> (timer handle, event)
+        self._retries: Dict[str, tuple] = {}
+        self.stats = {"published": 0, "duplicates": 0, "handled": 0, "retried": 0, "dead_lettered": 0}
+
+    def subscribe(self, event_type: str, handler: Callable[[Event], Any]) -> None:
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event_type: str, payload: Dict[str, Any], event_id: Optional[str] = None) -> None:
+        """Queue an event; safe to call from the event loop or a worker thread"""
+        event = Event(type=event_type, payload=payload)
+        if event_id:
+            event.id = event_id
+
+        if self._loop is None:
+            # Consumer not running (e.g. a script): handle inline
+            print(f"Event bus not started, handling {event.type} synchronously")
+            self._handle_inline(event)
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._enqueue(event)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, event)
+
+    def _enqueue(self, event: Event) -> None:
+        if event.id in self._pending:
+            self.stats["duplicates"] += 1
+            return
+        self._pending.add(event.id)
+        self.stats["published"] += 1
+        self._queue.put_nowait(event)
+
+    def _handle_inline(self, event: Event) -> None:
+        for handler in self._handlers.get(event.type, []):
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    print(f"Skipping async handler for {event.type} outside the event loop")
+            except Exception as e:
+                print(f"Error handling event {event.type} ({event.id}): {e}")
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drain queued events (up to timeout), then stop the consumer"""
+        if self._consumer is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        undelivered = self._queue.qsize() + len(self._retries)
+        for handle, _ in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        if undelivered:
+            print(f"Event bus stopped with {undelivered} events undelivered")
+        self._consumer.cancel()
+        self._consumer = None
+        self._loop = None
+
+    async def _drain(self) -> None:
+        # Pending retries aren't in the queue, so join() alone would miss
+        # them; deliver them now instead of waiting out their backoff
+        while True:
+            for handle, event in self._retries.values():
+                handle.cancel()
+                self._queue.put_nowait(event)
+            self._retries.clear()
+            await self._queue.join()
+            if not self._retries:
+                return
+
+    async def _consume(self) -> None:
+        while True:
+            event = await self._queue.get()
+            try:
+                await self._dispatch(event)
+            finally:
+                self._queue.task_done()
+
+    async def _dispatch(self, event: Event) -> None:
+        event.attempts += 1
+        try:
+            for handler in self._handlers.get(event.type, []):
+                if inspect.iscoroutinefunction(handler):
+                    await handler(event)
+                else:
+                    await asyncio.to_thread(handler, event)
+        except Exception as e:
+            if event.attempts >= self.max_attempts:
+                self.stats["dead_lettered"] += 1
+                self._finish(event)
+                print(f"Dropping event {event.type} ({event.id}) after {event.attempts} attempts: {e}")
+                return
+            delay = self.retry_base_delay * (2 ** (event.attempts - 1))
+            self.stats["retried"] += 1
+            print(f"Event {event.type} ({event.id}) failed, retrying in {delay:.1f}s: {e}")
+            handle = self._loop.call_later(delay, self._requeue, event)
+            self._retries[event.id] = (handle, event)
+            return
+
+        self.stats["handled"] += 1
+        self._finish(event)
+
+    def _requeue(self, event: Event) -> None:
+        self._retries.pop(event.id, None)
+        self._queue.put_nowait(event)
+
+    def _finish(self, event: Event) -> None:
+        self._pending.discard(event.id)
+
+
+@lru_cache()
+def get_event_bus() -> EventBus:
+    """Get the process-wide event bus"""
+    return EventBus(
+        max_attempts=settings.EVENT_MAX_ATTEMPTS,
+        retry_base_delay=settings.EVENT_RETRY_BASE_DELAY
+    )
@@ -0,0 +1,7 @@
+from .policy import CallSite, LLMDeadlineExceeded, LLMPolicy, get_llm_policy
+from .prompts import PromptRegistry, PromptTemplate, estimate_tokens, get_prompt_registry
+
+__all__ = [
+    'CallSite', 'LLMDeadlineExceeded', 'LLMPolicy', 'get_llm_policy',
+    'PromptRegistry', 'PromptTemplate', 'estimate_tokens', 'get_prompt_registry'
+]
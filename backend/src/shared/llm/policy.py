@@ -0,0 +1,192 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from groq import APITimeoutError, AsyncGroq
+from ..config.settings import settings
+
+
+DEFAULT_DEADLINE = 30.0  # seconds, for call sites missing from LLM_DEADLINES
+
+
+class LLMDeadlineExceeded(Exception):
+    """No model in the call site's list answered before its deadline"""
+
+
+@dataclass
+class CallSite:
+    """How one kind of LLM call is routed"""
+    models: List[str]  # preference order; later entries are fallbacks
+    deadline: float  # seconds for the whole call, fallbacks and hedges included
+    reserve: float = 0.0  # seconds of the deadline held back for each fallback
+    hedge: bool = True
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per (call site, model); timeouts count at their elapsed time"""
+
+    def __init__(self, window: int, min_samples: int):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, site: str, model: str, seconds: float) -> None:
+        self._samples.setdefault((site, model), deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, site: str, model: str) -> Optional[float]:
+        samples = self._samples.get((site, model))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            f"{site}:{model}": {"samples": len(samples), "p95": self.p95(site, model)}
+            for (site, model), samples in self._samples.items()
+        }
+
+
+class LLMPolicy:
+    """Deadline-aware chat completions with model tiering, hedging and fallback.
+
+    Each call site names an ordered model list and a deadline. A request that
+    runs past its model's observed p95 latency gets one hedged duplicate; the
+    first answer wins and the other is cancelled. Hedges are rationed by a
+    token bucket so a degraded provider doesn't get duplicated load. Errors or
+    timeouts fall through to the next model while deadline remains.
+    """
+
+    def __init__(self, client: AsyncGroq, sites: Dict[str, CallSite], tracker: LatencyTracker,
+                 hedge_rate: float = 0.1, hedge_burst: float = 5.0):
+        self.client = client
+        self.sites = sites
+        self.tracker = tracker
+        self.hedge_rate = hedge_rate  # tokens earned per call
+        self.hedge_burst = hedge_burst
+        self._hedge_tokens = hedge_burst
+        self.stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "fallbacks": 0, "deadline_exceeded": 0}
+
+    async def complete(self, site: str, **kwargs) -> Any:
+        """chat.completions.create() for `site`; kwargs are passed through (minus model)"""
+        response, _ = await self.complete_with_model(site, **kwargs)
+        return response
+
+    async def complete_with_model(self, site: str, **kwargs) -> Tuple[Any, str]:
+        """Like complete(), plus the configured model that answered (providers may report another name)"""
+        policy = self.sites[site]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.deadline
+        self.stats["calls"] += 1
+        self._hedge_tokens = min(self.hedge_burst, self._hedge_tokens + self.hedge_rate)
+        last_error: Optional[Exception] = None
+
+        for attempt, model in enumerate(policy.models):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            if attempt:
+                self.stats["fallbacks"] += 1
+                print(f"LLM {site}: falling back to {model} ({last_error})")
+            # Give this model everything except the fallbacks' reserve, so a
+            # healthy but slow answer isn't cut off; if the reserve no longer
+            # fits, split what's left evenly instead
+            fallbacks = len(policy.models) - attempt - 1
+            budget = remaining - policy.reserve * fallbacks
+            if budget <= 0:
+                budget = remaining / (fallbacks + 1)
+            try:
+                return await asyncio.wait_for(self._hedged(site, model, policy, budget, kwargs), budget), model
+            except asyncio.TimeoutError:
+                # Without this sample a stalled model's p95 would stay at its
+                # last healthy value
+                self.tracker.record(site, model, budget)
+                last_error = LLMDeadlineExceeded(f"{model} did not answer within {budget:.1f}s")
+            except APITimeoutError:
+                last_error = LLMDeadlineExceeded(f"{model} did not answer within {budget:.1f}s")
+            except Exception as e:
+                last_error = e
+
+        if last_error is None or isinstance(last_error, LLMDeadlineExceeded):
+            self.stats["deadline_exceeded"] += 1
+        raise last_error or LLMDeadlineExceeded(f"{site}: deadline of {policy.deadline}s exceeded")
+
+    def is_fallback(self, site: str, model: str) -> bool:
+        """Whether `model` (as returned by complete_with_model) is a fallback for the site"""
+        return model != self.sites[site].models[0]
+
+    async def _call(self, site: str, model: str, timeout: float, kwargs: Dict[str, Any]) -> Any:
+        started = time.monotonic()
+        try:
+            response = await self.client.chat.completions.create(model=model, timeout=timeout, **kwargs)
+        except APITimeoutError:
+            self.tracker.record(site, model, time.monotonic() - started)
+            raise
+        self.tracker.record(site, model, time.monotonic() - started)
+        return response
+
+    async def _hedged(self, site: str, model: str, policy: CallSite, timeout: float, kwargs: Dict[str, Any]) -> Any:
+        primary = asyncio.create_task(self._call(site, model, timeout, kwargs))
+        tasks = {primary}
+        try:
+            hedge_after = self.tracker.p95(site, model) if policy.hedge and settings.LLM_HEDGE_ENABLED else None
+            if hedge_after is None or hedge_after >= timeout:
+                return await primary
+
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done and self._hedge_tokens >= 1:
+                self._hedge_tokens -= 1
+                self.stats["hedges"] += 1
+                hedge = asyncio.create_task(self._call(site, model, timeout - hedge_after, kwargs))
+                tasks.add(hedge)
+
+            error: Optional[BaseException] = None
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancel the slower duplicate (or everything, if we timed out)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "latency": self.tracker.snapshot()}
+
+
+@lru_cache()
+def get_llm_policy(api_key: Optional[str] = None) -> LLMPolicy:
+    """Process-wide policy for a Groq API key, with call sites from settings"""
+    client = AsyncGroq(
+        api_key=api_key or settings.GROQ_API_KEY,
+        base_url=settings.GROQ_BASE_URL,
+        # Retries are the policy's job: fallback/hedging within the deadline
+        max_retries=0
+    )
+    quality = [settings.LLM_PRIMARY_MODEL, settings.LLM_FAST_MODEL]
+    fast = [settings.LLM_FAST_MODEL, settings.LLM_PRIMARY_MODEL]
+    routing = {
+        "resume_structure": quality,
+        "roadmap_generate": quality,
+        "roadmap_extend": fast,
+        "techstack_rerank": fast,
+    }
+    sites = {
+        site: CallSite(
+            models,
+            settings.LLM_DEADLINES.get(site, DEFAULT_DEADLINE),
+            settings.LLM_FALLBACK_RESERVES.get(site, 0.0)
+        )
+        for site, models in routing.items()
+    }
+    tracker = LatencyTracker(settings.LLM_LATENCY_WINDOW, settings.LLM_HEDGE_MIN_SAMPLES)
+    return LLMPolicy(client, sites, tracker, settings.LLM_HEDGE_RATE, settings.LLM_HEDGE_BURST)
@@ -0,0 +1,129 @@
+import hashlib
+import math
+import string
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough tokens-per-character ratio for English prose and JSON with the Llama
+# tokenizers Groq serves; good enough for budgeting, not for billing
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class PromptTemplate:
+    """A versioned prompt compiled once, at import time.
+
+    `template` uses str.format syntax. Fields given in `static` (e.g. a JSON
+    schema serialized once) are folded into the literal text at compile time,
+    so rendering is a single str.format_map over the precomputed text and
+    the per-call values. The version hash covers everything that shapes the model's
+    output, so caches keyed on it drop stale results when a prompt changes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: int,
+        template: str,
+        system: Optional[str] = None,
+        static: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.template = template
+        self._parts, self.fields = self._compile(template, static or {})
+        self._format = self._folded_template(self._parts, self.fields).format_map
+        self._field_set = frozenset(self.fields)
+        self._system_message = {"role": "system", "content": system} if system else None
+
+        static_text = "".join(literal for literal, _ in self._parts)
+        self.static_tokens = estimate_tokens(static_text) + (estimate_tokens(system) if system else 0)
+        digest = hashlib.sha256()
+        for chunk in (name, str(version), system or "", static_text, "\0".join(self.fields)):
+            digest.update(chunk.encode("utf-8"))
+            digest.update(b"\0")
+        self.version_hash = digest.hexdigest()[:16]
+
+    @staticmethod
+    def _compile(template: str, static: Dict[str, Any]) -> Tuple[List[Tuple[str, Optional[str]]], Tuple[str, ...]]:
+        """Split into (literal, field) pairs, merging static values into the literals"""
+        parts: List[Tuple[str, Optional[str]]] = []
+        literal = ""
+        for text, field, spec, conversion in string.Formatter().parse(template):
+            literal += text
+            if field is None:
+                continue
+            if spec or conversion:
+                raise ValueError(f"Prompt fields take no format spec or conversion: {{{field}}}")
+            if field in static:
+                literal += str(static[field])
+            else:
+                parts.append((literal, field))
+                literal = ""
+        parts.append((literal, None))
+        fields = tuple(dict.fromkeys(field for _, field in parts if field))
+        return parts, fields
+
+    @staticmethod
+    def _folded_template(parts: List[Tuple[str, Optional[str]]], fields: Tuple[str, ...]) -> str:
+        """Rebuild a format string from the parts, with static values now literal text"""
+        for field in fields:
+            # Dotted or indexed fields would make format_map reach into the values
+            if not field.isidentifier():
+                raise ValueError(f"Prompt field must be a plain name: {{{field}}}")
+        return "".join(
+            literal.replace("{", "{{").replace("}", "}}") + ("{" + field + "}" if field else "")
+            for literal, field in parts
+        )
+
+    def render(self, **values: Any) -> str:
+        if values.keys() != self._field_set:
+            raise TypeError(f"Prompt {self.name} takes exactly {list(self.fields)}, got {sorted(values)}")
+        return self._format(values)
+
+    def messages(self, **values: Any) -> List[Dict[str, str]]:
+        """Chat messages: the prebuilt system message (if any) plus the rendered user prompt"""
+        user = {"role": "user", "content": self.render(**values)}
+        return [self._system_message, user] if self._system_message else [user]
+
+    def estimate_prompt_tokens(self, **values: Any) -> int:
+        """Precomputed static tokens plus an estimate for the per-call values"""
+        return self.static_tokens + sum(estimate_tokens(str(values[field])) for field in self.fields)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "version_hash": self.version_hash,
+            "fields": list(self.fields),
+            "static_tokens": self.static_tokens,
+        }
+
+
+class PromptRegistry:
+    """Named prompt templates, registered once per process by the modules that own them"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        existing = self._templates.get(template.name)
+        if existing is not None and existing.version_hash != template.version_hash:
+            raise ValueError(f"Prompt {template.name} is already registered with different content")
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        return {name: template.describe() for name, template in sorted(self._templates.items())}
+
+
+@lru_cache()
+def get_prompt_registry() -> PromptRegistry:
+    """Get the process-wide prompt registry"""
+    return PromptRegistry()
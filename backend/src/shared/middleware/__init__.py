@@ -1 +1,5 @@
 # Middleware exports
+from .compression import add_compression_middleware
+from .admission import get_admission_controller
+
+__all__ = ['add_compression_middleware', 'get_admission_controller']
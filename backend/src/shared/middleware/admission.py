@@ -0,0 +1,275 @@
+import asyncio
+import math
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException
+from ..config.settings import settings
+from ..database.local_store import LocalSQLite
+
+
+@dataclass
+class ClassLimits:
+    """Admission limits for one class of LLM-bound endpoint"""
+    max_in_flight: int
+    max_queue: int
+    queue_timeout: float  # seconds a request may wait for a slot
+    user_rate: float  # tokens per second per user
+    user_burst: int
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: int) -> Tuple[float, float]:
+    """Take one token from a bucket; returns (remaining_tokens, retry_after)"""
+    tokens = min(float(burst), tokens + (now - updated) * rate)
+    if tokens >= 1.0:
+        return tokens - 1.0, 0.0
+    return tokens, (1.0 - tokens) / rate if rate > 0 else float(settings.ADMISSION_RETRY_AFTER)
+
+
+class LocalAdmissionStore:
+    """In-process store: limits apply per worker"""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._leases: Dict[str, Dict[str, float]] = {}
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens, retry_after = _refill(tokens, updated, now, rate, burst)
+            self._buckets[key] = (tokens, now)
+            return retry_after
+
+    def try_acquire(self, endpoint_class: str, limit: int, lease_id: str, ttl: float) -> bool:
+        with self._lock:
+            leases = self._leases.setdefault(endpoint_class, {})
+            if len(leases) >= limit:
+                return False
+            leases[lease_id] = time.monotonic() + ttl
+            return True
+
+    def release(self, endpoint_class: str, lease_id: str) -> None:
+        with self._lock:
+            self._leases.get(endpoint_class, {}).pop(lease_id, None)
+
+    def in_flight(self, endpoint_class: str) -> int:
+        with self._lock:
+            return len(self._leases.get(endpoint_class, {}))
+
+
+class SQLiteAdmissionStore:
+    """Host-local store shared by every worker process through one SQLite file.
+
+    In-flight slots are leases with an expiry, so a crashed worker can't leak
+    capacity for longer than ADMISSION_LEASE_TTL. Calls can wait on other
+    workers' write locks, so the controller runs them off the event loop.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.db = LocalSQLite(path)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_leases "
+            "(lease_id TEXT PRIMARY KEY, endpoint_class TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_admission_leases_class ON admission_leases(endpoint_class)")
+
+    def _conn(self):
+        return self.db.conn()
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        # Wall clock, not monotonic: timestamps are compared across processes
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM admission_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (float(burst), now)
+            tokens, retry_after = _refill(tokens, updated, now, rate, burst)
+            conn.execute(
+                "INSERT INTO admission_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    def try_acquire(self, endpoint_class: str, limit: int, lease_id: str, ttl: float) -> bool:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM admission_leases WHERE expires < ?", (now,))
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM admission_leases WHERE endpoint_class = ?", (endpoint_class,)
+            ).fetchone()
+            acquired = count < limit
+            if acquired:
+                conn.execute(
+                    "INSERT INTO admission_leases (lease_id, endpoint_class, expires) VALUES (?, ?, ?)",
+                    (lease_id, endpoint_class, now + ttl)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def release(self, endpoint_class: str, lease_id: str) -> None:
+        self._conn().execute("DELETE FROM admission_leases WHERE lease_id = ?", (lease_id,))
+
+    def in_flight(self, endpoint_class: str) -> int:
+        (count,) = self._conn().execute(
+            "SELECT COUNT(*) FROM admission_leases WHERE endpoint_class = ? AND expires >= ?",
+            (endpoint_class, time.time())
+        ).fetchone()
+        return count
+
+
+class AdmissionController:
+    """Global in-flight limits, per-user token buckets and a bounded wait queue.
+
+    Requests over their user's rate, or that can't get a slot before the queue
+    deadline, are rejected immediately with 429 + Retry-After rather than
+    piling up behind Groq rate limits.
+    """
+
+    def __init__(self, store, limits: Dict[str, ClassLimits], lease_ttl: float = 300.0):
+        self.store = store
+        self.limits = limits
+        self.lease_ttl = lease_ttl
+        # Wait-queue depth is tracked per process
+        self._waiting: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    async def _store(self, method: str, *args):
+        """Call a store method, in a worker thread if it may block on a lock"""
+        fn = getattr(self.store, method)
+        if self.store.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _reject(self, endpoint_class: str, detail: str, retry_after: float) -> HTTPException:
+        self.rejected[endpoint_class] = self.rejected.get(endpoint_class, 0) + 1
+        return HTTPException(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        endpoint_class: str,
+        user_key: Optional[str] = None,
+        on_wait: Optional[Callable[[], None]] = None
+    ) -> AsyncIterator[None]:
+        """Hold an in-flight slot for `endpoint_class` for the duration of the block.
+
+        `on_wait` is called if the request has to queue for a slot, e.g. to
+        cancel background work holding one.
+        """
+        limits = self.limits.get(endpoint_class)
+        if not settings.ADMISSION_ENABLED or limits is None:
+            yield
+            return
+
+        if user_key:
+            retry_after = await self._store(
+                "take_token", f"{endpoint_class}:{user_key}", limits.user_rate, limits.user_burst
+            )
+            if retry_after > 0:
+                raise self._reject(endpoint_class, "Rate limit exceeded, please retry later", retry_after)
+
+        lease_id = uuid.uuid4().hex
+        if not await self._store("try_acquire", endpoint_class, limits.max_in_flight, lease_id, self.lease_ttl):
+            if self._waiting.get(endpoint_class, 0) >= limits.max_queue:
+                raise self._reject(endpoint_class, "Server busy, please retry later", settings.ADMISSION_RETRY_AFTER)
+
+            self._waiting[endpoint_class] = self._waiting.get(endpoint_class, 0) + 1
+            if on_wait is not None:
+                on_wait()
+            try:
+                deadline = time.monotonic() + limits.queue_timeout
+                delay = 0.05
+                while True:
+                    if time.monotonic() + delay > deadline:
+                        raise self._reject(endpoint_class, "Server busy, please retry later", settings.ADMISSION_RETRY_AFTER)
+                    await asyncio.sleep(delay)
+                    if await self._store("try_acquire", endpoint_class, limits.max_in_flight, lease_id, self.lease_ttl):
+                        break
+                    delay = min(delay * 2, 0.5)
+            finally:
+                self._waiting[endpoint_class] -= 1
+
+        try:
+            yield
+        finally:
+            await self._store("release", endpoint_class, lease_id)
+
+    async def try_acquire_now(self, endpoint_class: str) -> Optional[str]:
+        """Take a slot for background work only if one is free; returns the lease id or None"""
+        limits = self.limits.get(endpoint_class)
+        lease_id = uuid.uuid4().hex
+        if not settings.ADMISSION_ENABLED or limits is None:
+            return lease_id
+        if await self._store("try_acquire", endpoint_class, limits.max_in_flight, lease_id, self.lease_ttl):
+            return lease_id
+        return None
+
+    async def release(self, endpoint_class: str, lease_id: str) -> None:
+        await self._store("release", endpoint_class, lease_id)
+
+    async def in_flight(self, endpoint_class: str) -> int:
+        return await self._store("in_flight", endpoint_class)
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {
+                "in_flight": await self._store("in_flight", name),
+                "waiting": self._waiting.get(name, 0),
+                "max_in_flight": limits.max_in_flight,
+                "rejected": self.rejected.get(name, 0),
+            }
+            for name, limits in self.limits.items()
+        }
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller configured from settings"""
+    if settings.ADMISSION_STORE_PATH:
+        store = SQLiteAdmissionStore(settings.ADMISSION_STORE_PATH)
+    else:
+        store = LocalAdmissionStore()
+
+    limits = {
+        endpoint_class: ClassLimits(
+            max_in_flight=max_in_flight,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            user_rate=settings.ADMISSION_USER_RATE_PER_MINUTE / 60.0,
+            user_burst=settings.ADMISSION_USER_BURST,
+        )
+        for endpoint_class, max_in_flight in settings.ADMISSION_MAX_IN_FLIGHT.items()
+    }
+    return AdmissionController(store, limits, lease_ttl=settings.ADMISSION_LEASE_TTL)
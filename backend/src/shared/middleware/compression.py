@@ -0,0 +1,37 @@
+from fastapi import FastAPI
+from starlette.middleware.gzip import GZipMiddleware
+from ..config.settings import settings
+
+# Brotli is optional; fall back to gzip when brotli-asgi isn't installed
+try:
+    from brotli_asgi import BrotliMiddleware
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Server-Sent Event streams must be flushed event by event, never buffered
+# by a compressor (Starlette's gzip already skips text/event-stream)
+UNCOMPRESSED_PATHS = [r"^/api/roadmap/stream/"]
+
+
+def add_compression_middleware(app: FastAPI) -> None:
+    """Compress responses above HTTP_COMPRESSION_MIN_SIZE bytes.
+
+    Clients sending `Accept-Encoding: br` get brotli when available, everyone
+    else gets gzip. Small bodies (and 304s) are passed through untouched.
+    """
+    if BROTLI_AVAILABLE:
+        app.add_middleware(
+            BrotliMiddleware,
+            minimum_size=settings.HTTP_COMPRESSION_MIN_SIZE,
+            quality=settings.HTTP_BROTLI_QUALITY,
+            gzip_fallback=True,
+            excluded_handlers=UNCOMPRESSED_PATHS
+        )
+        print("Response compression: brotli (gzip fallback)")
+    else:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.HTTP_COMPRESSION_MIN_SIZE
+        )
+        print("Response compression: gzip (install brotli-asgi for brotli)")
@@ -0,0 +1,4 @@
+from .profiler import profiled, ProfilingMiddleware
+from .routes import router
+
+__all__ = ['profiled', 'ProfilingMiddleware', 'router']
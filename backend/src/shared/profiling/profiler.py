@@ -0,0 +1,215 @@
+import contextvars
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from ..config.settings import settings
+
+# Ids of captures taken while serving the current request; None = not opted in
+_captures: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("profile_captures", default=None)
+
+# cProfile instances can't nest, so one capture runs at a time per process
+_capture_lock = threading.Lock()
+
+PROFILE_ID = re.compile(r"^[0-9]+-[a-z_]+-[0-9a-f]{8}$")
+
+
+def token_matches(value: Optional[str]) -> bool:
+    """True when `value` is the configured PROFILING_TOKEN"""
+    return bool(settings.PROFILING_TOKEN and value) and hmac.compare_digest(value, settings.PROFILING_TOKEN)
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _prune() -> None:
+    metas = sorted(f for f in os.listdir(settings.PROFILE_DIR) if f.endswith(".json"))
+    for name in metas[:max(0, len(metas) - settings.PROFILE_MAX_FILES)]:
+        profile_id = name[:-len(".json")]
+        for suffix in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(settings.PROFILE_DIR, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def _capture(name: str) -> Iterator[None]:
+    """cProfile + tracemalloc around the block; results land in PROFILE_DIR"""
+    if not _capture_lock.acquire(blocking=False):
+        # Another capture is running in this process; don't skew it
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    rss_before = _rss_bytes()
+    profile = cProfile.Profile()
+    started = time.perf_counter()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        elapsed = time.perf_counter() - started
+        try:
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            _write_capture(name, profile, before, after, peak, elapsed, rss_before)
+        except Exception as e:
+            print(f"Could not store profile for {name}: {e}")
+        finally:
+            _capture_lock.release()
+
+
+def _write_capture(name, profile, before, after, peak, elapsed, rss_before) -> None:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    profile_id = f"{int(time.time() * 1000)}-{name}-{uuid.uuid4().hex[:8]}"
+
+    profile.dump_stats(os.path.join(settings.PROFILE_DIR, f"{profile_id}.prof"))
+    summary = io.StringIO()
+    pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(30)
+
+    allocations = [
+        {"location": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+        for stat in after.compare_to(before, "lineno")[:25]
+    ]
+    rss_after = _rss_bytes()
+    meta = {
+        "id": profile_id,
+        "function": name,
+        "created_at": time.time(),
+        "duration_seconds": round(elapsed, 4),
+        "tracemalloc_peak_bytes": peak,
+        "rss_before_bytes": rss_before,
+        "rss_after_bytes": rss_after,
+        "pid": os.getpid(),
+        # Async captures include whatever else ran on the event loop meanwhile
+        "top_functions": summary.getvalue(),
+        "top_allocations": allocations,
+    }
+    with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.json"), "w") as f:
+        json.dump(meta, f)
+
+    captures = _captures.get()
+    if captures is not None:
+        captures.append(profile_id)
+    _prune()
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """Capture a profile of the decorated function for opted-in requests.
+
+    With PROFILING_ENABLED off the function is returned unchanged, so there
+    is no wrapper and no per-call cost at all.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not settings.PROFILING_ENABLED:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _captures.get() is None:
+                    return await func(*args, **kwargs)
+                with _capture(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _captures.get() is None:
+                return func(*args, **kwargs)
+            with _capture(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class ProfilingMiddleware:
+    """Opts a request into profiling via the X-Profile header or sampling.
+
+    Only installed when PROFILING_ENABLED is on. Ids of the captures taken are
+    returned in the X-Profile-Ids response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        requested = token_matches(headers.get(b"x-profile", b"").decode("latin-1"))
+        if not requested and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        captures: List[str] = []
+        reset = _captures.set(captures)
+
+        async def send_with_ids(message):
+            if message["type"] == "http.response.start" and captures:
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-ids", ",".join(captures).encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_ids)
+        finally:
+            _captures.reset(reset)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored captures, newest first (without the bulky summaries)"""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(settings.PROFILE_DIR), reverse=True):
+        if name.endswith(".json"):
+            meta = load_profile(name[:-len(".json")])
+            if meta:
+                profiles.append({k: v for k, v in meta.items() if k not in ("top_functions", "top_allocations")})
+    return profiles
+
+
+def load_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def profile_stats_path(profile_id: str) -> Optional[str]:
+    """Path of the pstats dump (load with pstats or snakeviz)"""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.prof")
+    return path if os.path.exists(path) else None
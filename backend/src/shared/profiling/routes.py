@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+from .profiler import list_profiles, load_profile, profile_stats_path, token_matches
+
+router = APIRouter()
+
+def _authorize(token: Optional[str]) -> None:
+    if not token_matches(token):
+        raise HTTPException(status_code=403, detail="Valid X-Profile token required")
+
+@router.get("/profiles")
+async def get_profiles(x_profile: Optional[str] = Header(None)):
+    """Stored profile captures, newest first"""
+    _authorize(x_profile)
+    return {"profiles": list_profiles()}
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """Capture summary: top functions by cumulative time and allocation growth"""
+    _authorize(x_profile)
+    meta = load_profile(profile_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return meta
+
+@router.get("/profiles/{profile_id}/pstats")
+async def download_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """Raw cProfile dump for pstats/snakeviz"""
+    _authorize(x_profile)
+    path = profile_stats_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -1 +1,12 @@
 # Shared utilities
+from .http_cache import conditional_json_response, compute_etag
+from .export import export_fields, require_export_access
+from .json_patch import apply_patch, JsonPatchError, JsonPatchTestFailed
+from .json_response import FastJSONResponse, dumps, loads, streaming_json_response, ndjson_response
+
+__all__ = [
+    'conditional_json_response', 'compute_etag',
+    'export_fields', 'require_export_access',
+    'apply_patch', 'JsonPatchError', 'JsonPatchTestFailed',
+    'FastJSONResponse', 'dumps', 'loads', 'streaming_json_response', 'ndjson_response'
+]
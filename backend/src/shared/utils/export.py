@@ -0,0 +1,57 @@
+import asyncio
+import hmac
+from typing import List, Optional
+from fastapi import HTTPException, Request
+from ..config.settings import settings
+from ..database import get_db
+
+
+def export_fields(fields: Optional[str], allowed: List[str]) -> List[str]:
+    """Parse a comma-separated `fields` projection; all columns when omitted"""
+    if not fields:
+        return list(allowed)
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown export fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    return requested
+
+
+def _has_admin_token(request: Request) -> bool:
+    token = request.headers.get("X-Export-Token", "")
+    return bool(settings.EXPORT_ADMIN_TOKEN) and hmac.compare_digest(token, settings.EXPORT_ADMIN_TOKEN)
+
+
+def _verified_user_id(request: Request) -> Optional[str]:
+    """Id of the Supabase user whose access token is in the Authorization header"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        response = get_db().auth.get_user(token)
+    except Exception:
+        return None
+    user = getattr(response, "user", None)
+    return getattr(user, "id", None)
+
+
+async def require_export_access(request: Request, user_id: Optional[str]) -> None:
+    """Allow an export only to the admin token, or to the user it covers.
+
+    The backend reads with the service-role key, which bypasses row level
+    security, so a per-user export needs a Supabase access token
+    (Authorization: Bearer) belonging to that user.
+    """
+    if _has_admin_token(request):
+        return
+    if not user_id:
+        raise HTTPException(status_code=403, detail="Exporting all users requires a valid X-Export-Token")
+    # get_user() is a blocking call to Supabase Auth
+    caller = await asyncio.to_thread(_verified_user_id, request)
+    if caller is None:
+        raise HTTPException(status_code=401, detail="A valid Supabase access token is required")
+    if str(caller) != user_id:
+        raise HTTPException(status_code=403, detail="You can only export your own data")
@@ -0,0 +1,97 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+from fastapi import Request, Response
+from ..config.settings import settings
+from .json_response import dumps
+
+
+def compute_etag(body: bytes) -> str:
+    """Weak ETag derived from the serialized response body.
+
+    Weak because the compression middleware may re-encode the body on the
+    way out; the representation is still semantically identical.
+    """
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse a Supabase ISO timestamp into an aware datetime (seconds precision)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+def conditional_json_response(
+    request: Request,
+    payload: Any,
+    updated_at: Any = None,
+    status_code: int = 200
+) -> Response:
+    """Serialize payload as JSON with ETag/Last-Modified validators.
+
+    Returns a bodiless 304 when the client's If-None-Match (or, if absent,
+    If-Modified-Since) shows it already holds this representation.
+    """
+    body = dumps(payload)
+    etag = compute_etag(body)
+    last_modified = _parse_timestamp(updated_at)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since and last_modified:
+        not_modified = _not_modified_since(if_modified_since, last_modified)
+    else:
+        not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
@@ -0,0 +1,184 @@
+import copy
+import re
+from typing import Any, Callable, Dict, List, Union
+
+# RFC 6901 array index: "0" or a number without leading zeros
+_ARRAY_INDEX = re.compile(r"^(0|[1-9][0-9]*)$")
+
+
+class JsonPatchError(ValueError):
+    """The patch is malformed or refers to a location that doesn't exist"""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """A `test` operation did not match the document"""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split an RFC 6901 JSON Pointer into unescaped reference tokens"""
+    if not isinstance(pointer, str):
+        raise JsonPatchError(f"JSON Pointer must be a string, got {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"JSON Pointer must start with '/': {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container: List, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not _ARRAY_INDEX.match(token):
+        raise JsonPatchError(f"Invalid array index {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index {index} out of range")
+    return index
+
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    value = document
+    for token in tokens:
+        if isinstance(value, dict):
+            if token not in value:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[_index(value, token)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return value
+
+
+def _with_parent(document: Any, tokens: List[str], mutate: Callable[[Union[Dict, List], str], None]) -> Any:
+    """Copy only the containers along the path, then mutate the (copied) parent.
+
+    Untouched subtrees stay shared with the input, so applying a patch costs
+    time proportional to the path depth, not the document size.
+    """
+    if isinstance(document, dict):
+        container = dict(document)
+    elif isinstance(document, list):
+        container = list(document)
+    else:
+        raise JsonPatchError("Path goes through a value that is not an object or array")
+
+    head, rest = tokens[0], tokens[1:]
+    if not rest:
+        mutate(container, head)
+        return container
+
+    if isinstance(container, dict):
+        if head not in container:
+            raise JsonPatchError(f"Path not found: {head!r}")
+        key = head
+    else:
+        key = _index(container, head)
+    container[key] = _with_parent(container[key], rest, mutate)
+    return container
+
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+
+    def mutate(parent, token):
+        if isinstance(parent, dict):
+            parent[token] = value
+        else:
+            parent.insert(_index(parent, token, allow_end=True), value)
+
+    return _with_parent(document, tokens, mutate)
+
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+
+    def mutate(parent, token):
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"Path not found: {token!r}")
+            del parent[token]
+        else:
+            del parent[_index(parent, token)]
+
+    return _with_parent(document, tokens, mutate)
+
+
+def _replace(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+
+    def mutate(parent, token):
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"Path not found: {token!r}")
+            parent[token] = value
+        else:
+            parent[_index(parent, token)] = value
+
+    return _with_parent(document, tokens, mutate)
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """Equality per RFC 6902 4.6: no bool/number coercion, order-insensitive objects"""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def apply_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+    """Apply RFC 6902 operations and return the patched document.
+
+    The input is never modified. Operations apply atomically: if any one
+    fails, JsonPatchError (or JsonPatchTestFailed) is raised and nothing is
+    returned.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("A JSON Patch must be an array of operations")
+
+    for number, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise JsonPatchError(f"Operation {number} is not an object")
+        op = operation.get("op")
+        if "path" not in operation:
+            raise JsonPatchError(f"Operation {number} has no 'path'")
+        tokens = parse_pointer(operation["path"])
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {number} ({op}) has no 'value'")
+        if op in ("move", "copy") and "from" not in operation:
+            raise JsonPatchError(f"Operation {number} ({op}) has no 'from'")
+
+        if op == "add":
+            # Values may be shared by later copy/move ops; keep them independent
+            document = _add(document, tokens, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            document = _remove(document, tokens)
+        elif op == "replace":
+            document = _replace(document, tokens, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = parse_pointer(operation["from"])
+            if tokens[:len(source)] == source and len(tokens) > len(source):
+                raise JsonPatchError(f"Operation {number} moves a value into its own child")
+            value = _resolve(document, source)
+            document = _add(_remove(document, source), tokens, value)
+        elif op == "copy":
+            value = copy.deepcopy(_resolve(document, parse_pointer(operation["from"])))
+            document = _add(document, tokens, value)
+        elif op == "test":
+            if not _json_equal(_resolve(document, tokens), operation["value"]):
+                raise JsonPatchTestFailed(f"Test failed at {operation['path']!r}")
+        else:
+            raise JsonPatchError(f"Operation {number} has unknown op {op!r}")
+
+    return document
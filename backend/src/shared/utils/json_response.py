@@ -0,0 +1,74 @@
+import json
+from typing import Any, Iterable, Iterator, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# orjson is optional; it is several times faster than the stdlib encoder on
+# the large nested roadmap documents
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    return str(value)
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes using the fastest available encoder"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with orjson when installed.
+
+    Returning one of these from a route also skips FastAPI's response_model
+    validation and jsonable_encoder pass, which is pure overhead for the
+    pass-through Dict[str, Any] payloads produced by the LLM.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def iter_json_object(fields: dict, array_key: str, items: Iterable[Any]) -> Iterator[bytes]:
+    """Yield `{...fields, "<array_key>": [item, ...]}` one array element at a time"""
+    head = dumps(fields)
+    # Re-open the serialized object so the array can be appended to it
+    yield head[:-1] + (b"," if fields else b"") + dumps(array_key) + b":["
+    first = True
+    for item in items:
+        if not first:
+            yield b","
+        yield dumps(item)
+        first = False
+    yield b"]}"
+
+
+def streaming_json_response(fields: dict, array_key: str, items: Iterable[Any]) -> StreamingResponse:
+    """Stream a JSON object whose large array is produced lazily"""
+    return StreamingResponse(
+        iter_json_object(fields, array_key, items),
+        media_type="application/json"
+    )
+
+
+def iter_ndjson(items: Iterable[Any]) -> Iterator[bytes]:
+    """One compact JSON document per line"""
+    for item in items:
+        yield dumps(item) + b"\n"
+
+
+def ndjson_response(items: Iterable[Any], filename: Optional[str] = None) -> StreamingResponse:
+    """Stream newline-delimited JSON; sync iterables are pulled from a worker thread"""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else None
+    return StreamingResponse(iter_ndjson(items), media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,14 @@
+-- Run this SQL in Supabase SQL Editor after supabase-setup.sql
+-- Keyset-pagination indexes for the NDJSON export endpoints
+
+-- Export pages continue after the last (created_at, id) seen, so each page is
+-- an index range scan instead of an OFFSET that rereads every earlier row.
+CREATE INDEX IF NOT EXISTS idx_resumes_created_at_id
+    ON resumes(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_resumes_user_created_at_id
+    ON resumes(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_learning_roadmaps_created_at_id
+    ON learning_roadmaps(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_learning_roadmaps_user_created_at_id
+    ON learning_roadmaps(user_id, created_at, id);
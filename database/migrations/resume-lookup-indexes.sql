@@ -0,0 +1,97 @@
+-- Run this SQL in Supabase SQL Editor after supabase-setup.sql
+-- Index-backed resume lookups: by id, by skill, and latest resume per user
+
+-- The backend now resolves resumes by primary key (the `id` returned from
+-- store_resume), so candidate lookups are already index scans.
+
+-- Skill lookups: `data -> 'skills' @> '{"technical": ["Python"]}'`
+-- (PostgREST: ?data->skills=cs.{"technical":["Python"]})
+CREATE INDEX IF NOT EXISTS idx_resumes_skills
+    ON resumes USING GIN ((data -> 'skills') jsonb_path_ops);
+
+-- Latest resume per user. A generated column can only see its own row, so
+-- the flag is maintained by a trigger instead.
+ALTER TABLE resumes ADD COLUMN IF NOT EXISTS is_latest BOOLEAN NOT NULL DEFAULT false;
+
+CREATE OR REPLACE FUNCTION refresh_latest_resume(p_user_id UUID)
+RETURNS VOID AS $$
+DECLARE
+    v_latest UUID;
+BEGIN
+    IF p_user_id IS NULL THEN
+        RETURN;
+    END IF;
+    -- Serialize concurrent inserts for one user so only one row ends up latest
+    PERFORM pg_advisory_xact_lock(hashtext(p_user_id::text));
+
+    SELECT id INTO v_latest
+    FROM resumes
+    WHERE user_id = p_user_id
+    ORDER BY created_at DESC NULLS LAST, id DESC
+    LIMIT 1;
+
+    -- Clear the old flag before setting the new one; the unique index below
+    -- is checked row by row
+    UPDATE resumes
+    SET is_latest = false
+    WHERE user_id = p_user_id AND is_latest AND id IS DISTINCT FROM v_latest;
+
+    UPDATE resumes
+    SET is_latest = true
+    WHERE id = v_latest AND NOT is_latest;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumes_maintain_latest()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_latest_resume(OLD.user_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.user_id IS DISTINCT FROM OLD.user_id THEN
+        PERFORM refresh_latest_resume(NEW.user_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only changes to ownership or ordering can move the flag; the trigger's own
+-- is_latest updates don't re-fire it
+DROP TRIGGER IF EXISTS trg_resumes_latest ON resumes;
+CREATE TRIGGER trg_resumes_latest
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, created_at ON resumes
+    FOR EACH ROW EXECUTE FUNCTION resumes_maintain_latest();
+
+-- Backfill existing rows
+UPDATE resumes r
+SET is_latest = true
+FROM (
+    SELECT DISTINCT ON (user_id) id
+    FROM resumes
+    WHERE user_id IS NOT NULL
+    ORDER BY user_id, created_at DESC NULLS LAST, id DESC
+) latest
+WHERE r.id = latest.id AND NOT r.is_latest;
+
+-- At most one latest resume per user; also the index for "latest resume of X"
+CREATE UNIQUE INDEX IF NOT EXISTS idx_resumes_latest_per_user
+    ON resumes(user_id) WHERE is_latest;
+
+-- Skill propagation now finds the latest resume through that index
+CREATE OR REPLACE FUNCTION append_resume_skill(p_user_id UUID, p_skill TEXT)
+RETURNS UUID AS $$
+    UPDATE resumes r
+    SET data = jsonb_set(
+        jsonb_set(
+            r.data,
+            '{skills}',
+            COALESCE(r.data -> 'skills', '{"technical": [], "tools": [], "domain": []}'::jsonb)
+        ),
+        '{skills,technical}',
+        COALESCE(r.data #> '{skills,technical}', '[]'::jsonb) || to_jsonb(p_skill)
+    )
+    WHERE r.user_id = p_user_id
+      AND r.is_latest
+      AND NOT (COALESCE(r.data #> '{skills,technical}', '[]'::jsonb) ? p_skill)
+    RETURNING r.id;
+$$ LANGUAGE sql;
@@ -0,0 +1,148 @@
+-- Run this SQL in Supabase SQL Editor after roadmap-progress-functions.sql
+-- Content-addressed storage for generated roadmap bodies
+
+-- Generated roadmaps are often identical across users (cached or reused
+-- plans), so each distinct body is stored once, keyed by the SHA-256 of its
+-- canonical jsonb text. learning_roadmaps rows keep only the ordered hashes
+-- plus their own start date and progress.
+CREATE OR REPLACE FUNCTION roadmap_body_hash(p_body JSONB)
+RETURNS TEXT AS $$
+    SELECT encode(sha256(convert_to(p_body::text, 'UTF8')), 'hex');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE IF NOT EXISTS roadmap_bodies (
+    hash TEXT PRIMARY KEY,
+    body JSONB NOT NULL,
+    -- Lets progress updates count days without detoasting the body
+    tech_stack TEXT GENERATED ALWAYS AS (body ->> 'tech_stack') STORED,
+    total_days INTEGER GENERATED ALWAYS AS (
+        CASE WHEN jsonb_typeof(body -> 'daily_plan') = 'array'
+             THEN jsonb_array_length(body -> 'daily_plan') ELSE 0 END
+    ) STORED,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Bodies are read by the backend's service role only
+ALTER TABLE roadmap_bodies ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE learning_roadmaps ADD COLUMN IF NOT EXISTS body_hashes TEXT[];
+ALTER TABLE learning_roadmaps ALTER COLUMN roadmaps DROP NOT NULL;
+ALTER TABLE learning_roadmaps DROP CONSTRAINT IF EXISTS learning_roadmaps_has_body;
+ALTER TABLE learning_roadmaps ADD CONSTRAINT learning_roadmaps_has_body
+    CHECK (roadmaps IS NOT NULL OR body_hashes IS NOT NULL);
+
+-- Finds the rows still referencing a body (used by prune_roadmap_bodies)
+CREATE INDEX IF NOT EXISTS idx_learning_roadmaps_body_hashes
+    ON learning_roadmaps USING GIN (body_hashes);
+
+-- Store a new learning roadmap in one round-trip: upsert each body, then
+-- insert the row with the ordered hashes. Returns the new row id.
+CREATE OR REPLACE FUNCTION create_learning_roadmap(
+    p_user_id UUID,
+    p_roadmaps JSONB,
+    p_start_date DATE
+)
+RETURNS UUID AS $$
+DECLARE
+    v_hashes TEXT[];
+    v_id UUID;
+BEGIN
+    SELECT COALESCE(array_agg(roadmap_body_hash(r.value) ORDER BY r.ordinality), '{}')
+    INTO v_hashes
+    FROM jsonb_array_elements(p_roadmaps) WITH ORDINALITY r;
+
+    -- Touching last_used_at locks an existing body, so a concurrent prune
+    -- re-checks it and keeps it
+    INSERT INTO roadmap_bodies (hash, body)
+    SELECT DISTINCT ON (roadmap_body_hash(r.value)) roadmap_body_hash(r.value), r.value
+    FROM jsonb_array_elements(p_roadmaps) r
+    ON CONFLICT (hash) DO UPDATE SET last_used_at = NOW();
+
+    INSERT INTO learning_roadmaps (user_id, body_hashes, start_date)
+    VALUES (p_user_id, v_hashes, p_start_date)
+    RETURNING id INTO v_id;
+    RETURN v_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same contract as before; the stack's day count now comes from the
+-- referenced body (or the inline roadmaps of rows not migrated yet)
+CREATE OR REPLACE FUNCTION set_roadmap_progress(
+    p_roadmap_id UUID,
+    p_tech_stack TEXT,
+    p_day INTEGER,
+    p_completed BOOLEAN
+)
+RETURNS TABLE (user_id UUID, total_days INTEGER, completed_days INTEGER) AS $$
+    UPDATE learning_roadmaps lr
+    SET progress = jsonb_set(
+            COALESCE(lr.progress, '{}'::jsonb),
+            ARRAY[p_tech_stack],
+            COALESCE(lr.progress -> p_tech_stack, '{}'::jsonb) || jsonb_build_object(p_day::text, p_completed)
+        ),
+        updated_at = NOW()
+    WHERE lr.id = p_roadmap_id
+    RETURNING
+        lr.user_id,
+        COALESCE(
+            (
+                SELECT b.total_days
+                FROM roadmap_bodies b
+                WHERE b.hash = ANY(lr.body_hashes) AND b.tech_stack = p_tech_stack
+                LIMIT 1
+            ),
+            (
+                SELECT COALESCE(jsonb_array_length(r -> 'daily_plan'), 0)
+                FROM jsonb_array_elements(COALESCE(lr.roadmaps, '[]'::jsonb)) r
+                WHERE r ->> 'tech_stack' = p_tech_stack
+                LIMIT 1
+            )
+        ),
+        (
+            SELECT COUNT(*)::int
+            FROM jsonb_each(lr.progress -> p_tech_stack) e
+            WHERE e.value = 'true'::jsonb
+        );
+$$ LANGUAGE sql;
+
+-- Delete bodies no roadmap references any more. Bodies used within
+-- p_min_age are kept so an in-flight create_learning_roadmap never loses its
+-- body. Run periodically (e.g. from pg_cron); returns the number deleted.
+CREATE OR REPLACE FUNCTION prune_roadmap_bodies(p_min_age INTERVAL DEFAULT INTERVAL '1 day')
+RETURNS INTEGER AS $$
+    WITH deleted AS (
+        DELETE FROM roadmap_bodies b
+        WHERE b.last_used_at < NOW() - p_min_age
+          AND NOT EXISTS (
+              SELECT 1 FROM learning_roadmaps lr WHERE lr.body_hashes @> ARRAY[b.hash]
+          )
+        RETURNING 1
+    )
+    SELECT COUNT(*)::int FROM deleted;
+$$ LANGUAGE sql;
+
+-- Move existing inline roadmaps into roadmap_bodies. Safe to re-run: only
+-- rows without body_hashes are touched, and last_accessed (which orders the
+-- active roadmap) is left as it was.
+BEGIN;
+
+ALTER TABLE learning_roadmaps DISABLE TRIGGER trigger_update_roadmap_last_accessed;
+
+INSERT INTO roadmap_bodies (hash, body)
+SELECT DISTINCT ON (roadmap_body_hash(r.value)) roadmap_body_hash(r.value), r.value
+FROM learning_roadmaps lr, jsonb_array_elements(lr.roadmaps) r
+WHERE lr.body_hashes IS NULL AND jsonb_typeof(lr.roadmaps) = 'array'
+ON CONFLICT (hash) DO NOTHING;
+
+UPDATE learning_roadmaps lr
+SET body_hashes = (
+        SELECT COALESCE(array_agg(roadmap_body_hash(r.value) ORDER BY r.ordinality), '{}')
+        FROM jsonb_array_elements(lr.roadmaps) WITH ORDINALITY r
+    ),
+    roadmaps = NULL
+WHERE lr.body_hashes IS NULL AND jsonb_typeof(lr.roadmaps) = 'array';
+
+ALTER TABLE learning_roadmaps ENABLE TRIGGER trigger_update_roadmap_last_accessed;
+
+COMMIT;
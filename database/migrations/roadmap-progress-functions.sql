@@ -0,0 +1,62 @@
+-- Run this SQL in Supabase SQL Editor after supabase-setup.sql
+-- Single round-trip progress updates and targeted skill propagation
+
+-- Set one day's completion flag and return the stack's completion counts.
+-- Replaces the select-then-update pair in LearningRoadmapDB.update_progress.
+CREATE OR REPLACE FUNCTION set_roadmap_progress(
+    p_roadmap_id UUID,
+    p_tech_stack TEXT,
+    p_day INTEGER,
+    p_completed BOOLEAN
+)
+RETURNS TABLE (user_id UUID, total_days INTEGER, completed_days INTEGER) AS $$
+    UPDATE learning_roadmaps lr
+    SET progress = jsonb_set(
+            COALESCE(lr.progress, '{}'::jsonb),
+            ARRAY[p_tech_stack],
+            COALESCE(lr.progress -> p_tech_stack, '{}'::jsonb) || jsonb_build_object(p_day::text, p_completed)
+        ),
+        updated_at = NOW()
+    WHERE lr.id = p_roadmap_id
+    RETURNING
+        lr.user_id,
+        (
+            SELECT COALESCE(jsonb_array_length(r -> 'daily_plan'), 0)
+            FROM jsonb_array_elements(lr.roadmaps) r
+            WHERE r ->> 'tech_stack' = p_tech_stack
+            LIMIT 1
+        ),
+        (
+            SELECT COUNT(*)::int
+            FROM jsonb_each(lr.progress -> p_tech_stack) e
+            WHERE e.value = 'true'::jsonb
+        );
+$$ LANGUAGE sql;
+
+-- Append a skill to data->skills->technical of the user's latest resume only.
+-- Returns the patched resume id, or NULL if there is no resume or the skill
+-- is already present (safe to retry).
+CREATE OR REPLACE FUNCTION append_resume_skill(p_user_id UUID, p_skill TEXT)
+RETURNS UUID AS $$
+    WITH latest AS (
+        SELECT id
+        FROM resumes
+        WHERE user_id = p_user_id
+        ORDER BY created_at DESC
+        LIMIT 1
+    )
+    UPDATE resumes r
+    SET data = jsonb_set(
+        jsonb_set(
+            r.data,
+            '{skills}',
+            COALESCE(r.data -> 'skills', '{"technical": [], "tools": [], "domain": []}'::jsonb)
+        ),
+        '{skills,technical}',
+        COALESCE(r.data #> '{skills,technical}', '[]'::jsonb) || to_jsonb(p_skill)
+    )
+    FROM latest
+    WHERE r.id = latest.id
+      AND NOT (COALESCE(r.data #> '{skills,technical}', '[]'::jsonb) ? p_skill)
+    RETURNING r.id;
+$$ LANGUAGE sql;
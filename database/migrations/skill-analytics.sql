@@ -0,0 +1,175 @@
+-- Run this SQL in Supabase SQL Editor after resume-lookup-indexes.sql
+-- Incrementally maintained skill counts for the analytics endpoints
+
+-- Same canonical form as normalize_stack_name() in the backend, so
+-- "React.js", "ReactJS" and "react" count as one skill (but AngularJS stays
+-- apart from Angular)
+CREATE OR REPLACE FUNCTION normalize_skill(p_name TEXT)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN regexp_replace(lower(btrim(p_name)), '[\s.]+', '', 'g') IN ('angularjs') THEN 'angularjs'
+        ELSE btrim(regexp_replace(
+            COALESCE(NULLIF(regexp_replace(lower(btrim(p_name)), '\s*\.?\s*js$', ''), ''), lower(btrim(p_name))),
+            '[^a-z0-9+#]+', ' ', 'g'
+        ))
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- One row per distinct skill in a resume's `skills` object
+-- ({"technical": [...], "tools": [...], ...}); a flat array counts as "general"
+CREATE OR REPLACE FUNCTION resume_skill_rows(p_data JSONB)
+RETURNS TABLE (skill TEXT, display_name TEXT, categories TEXT[]) AS $$
+    WITH entries AS (
+        SELECT c.key AS category, s.value AS name
+        FROM jsonb_each(
+                CASE WHEN jsonb_typeof(p_data -> 'skills') = 'object' THEN p_data -> 'skills' ELSE '{}'::jsonb END
+             ) c,
+             jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(c.value) = 'array' THEN c.value ELSE '[]'::jsonb END
+             ) s
+        UNION ALL
+        SELECT 'general', s.value
+        FROM jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(p_data -> 'skills') = 'array' THEN p_data -> 'skills' ELSE '[]'::jsonb END
+             ) s
+    )
+    SELECT normalize_skill(name), min(btrim(name)), array_agg(DISTINCT category ORDER BY category)
+    FROM entries
+    WHERE normalize_skill(name) <> ''
+    GROUP BY normalize_skill(name);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Skills of each user's latest resume only, so every candidate counts once
+CREATE TABLE IF NOT EXISTS resume_skills (
+    resume_id UUID NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+    user_id UUID,
+    skill TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    categories TEXT[] NOT NULL,
+    PRIMARY KEY (resume_id, skill)
+);
+CREATE INDEX IF NOT EXISTS idx_resume_skills_skill ON resume_skills(skill);
+
+-- Candidates per skill (any category) and per (category, skill)
+CREATE TABLE IF NOT EXISTS skill_counts (
+    skill TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    candidate_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_skill_counts_top ON skill_counts(candidate_count DESC, skill);
+CREATE INDEX IF NOT EXISTS idx_skill_counts_prefix ON skill_counts(skill text_pattern_ops);
+
+CREATE TABLE IF NOT EXISTS skill_category_counts (
+    category TEXT NOT NULL,
+    skill TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    candidate_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (category, skill)
+);
+CREATE INDEX IF NOT EXISTS idx_skill_category_counts_top
+    ON skill_category_counts(category, candidate_count DESC, skill);
+
+-- Analytics are read by the backend's service role only
+ALTER TABLE resume_skills ENABLE ROW LEVEL SECURITY;
+ALTER TABLE skill_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE skill_category_counts ENABLE ROW LEVEL SECURITY;
+
+-- Counters follow resume_skills row by row
+CREATE OR REPLACE FUNCTION resume_skills_maintain_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO skill_counts (skill, display_name, candidate_count)
+        VALUES (NEW.skill, NEW.display_name, 1)
+        ON CONFLICT (skill) DO UPDATE SET candidate_count = skill_counts.candidate_count + 1;
+
+        INSERT INTO skill_category_counts (category, skill, display_name, candidate_count)
+        SELECT category, NEW.skill, NEW.display_name, 1 FROM unnest(NEW.categories) AS category
+        ON CONFLICT (category, skill) DO UPDATE
+            SET candidate_count = skill_category_counts.candidate_count + 1;
+        RETURN NULL;
+    END IF;
+
+    UPDATE skill_counts SET candidate_count = candidate_count - 1 WHERE skill = OLD.skill;
+    DELETE FROM skill_counts WHERE skill = OLD.skill AND candidate_count <= 0;
+
+    UPDATE skill_category_counts SET candidate_count = candidate_count - 1
+    WHERE skill = OLD.skill AND category = ANY(OLD.categories);
+    DELETE FROM skill_category_counts
+    WHERE skill = OLD.skill AND category = ANY(OLD.categories) AND candidate_count <= 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS trg_resume_skills_counts ON resume_skills;
+CREATE TRIGGER trg_resume_skills_counts
+    AFTER INSERT OR DELETE ON resume_skills
+    FOR EACH ROW EXECUTE FUNCTION resume_skills_maintain_counts();
+
+-- Candidates per group of skill names, e.g. {"Kubernetes": ["kubernetes", "k8s"]}
+-- (names already normalized). A candidate listing several names of one group
+-- counts once; resume_skills is read by its skill index.
+CREATE OR REPLACE FUNCTION count_skill_groups(p_groups JSONB)
+RETURNS TABLE (name TEXT, candidate_count INTEGER) AS $$
+    SELECT g.key, (
+        SELECT COUNT(DISTINCT rs.resume_id)::int
+        FROM resume_skills rs
+        WHERE rs.skill IN (SELECT jsonb_array_elements_text(g.value))
+    )
+    FROM jsonb_each(p_groups) g
+    WHERE jsonb_typeof(g.value) = 'array';
+$$ LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public;
+
+-- resume_skills follows resumes: any write to a latest resume's skills
+-- (store_resume, update_resume, append_resume_skill, or the frontend writing
+-- directly) diffs its rows; losing is_latest removes them. Deletes cascade.
+CREATE OR REPLACE FUNCTION resumes_sync_skills()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_current resumes%ROWTYPE;
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.is_latest = OLD.is_latest
+       AND NEW.user_id IS NOT DISTINCT FROM OLD.user_id
+       AND NEW.data -> 'skills' IS NOT DISTINCT FROM OLD.data -> 'skills' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Re-read the row: trg_resumes_latest fires first and may already have
+    -- flipped is_latest, which NEW doesn't reflect
+    SELECT * INTO v_current FROM resumes WHERE id = NEW.id;
+    IF NOT FOUND OR NOT v_current.is_latest THEN
+        DELETE FROM resume_skills WHERE resume_id = NEW.id;
+        RETURN NULL;
+    END IF;
+
+    UPDATE resume_skills SET user_id = v_current.user_id
+    WHERE resume_id = v_current.id AND user_id IS DISTINCT FROM v_current.user_id;
+
+    -- Only touch rows that changed, so unrelated counters aren't rewritten
+    DELETE FROM resume_skills rs
+    WHERE rs.resume_id = v_current.id
+      AND NOT EXISTS (
+          SELECT 1 FROM resume_skill_rows(v_current.data) x
+          WHERE x.skill = rs.skill AND x.categories = rs.categories
+      );
+
+    INSERT INTO resume_skills (resume_id, user_id, skill, display_name, categories)
+    SELECT v_current.id, v_current.user_id, x.skill, x.display_name, x.categories
+    FROM resume_skill_rows(v_current.data) x
+    ON CONFLICT (resume_id, skill) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS trg_resumes_sync_skills ON resumes;
+CREATE TRIGGER trg_resumes_sync_skills
+    AFTER INSERT OR UPDATE OF data, is_latest, user_id ON resumes
+    FOR EACH ROW EXECUTE FUNCTION resumes_sync_skills();
+
+-- Backfill from the current latest resumes (the counters fill via trigger)
+INSERT INTO resume_skills (resume_id, user_id, skill, display_name, categories)
+SELECT r.id, r.user_id, x.skill, x.display_name, x.categories
+FROM resumes r, resume_skill_rows(r.data) x
+WHERE r.is_latest
+ON CONFLICT (resume_id, skill) DO NOTHING;
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { ChevronLeft, ChevronRight, X, CheckCircle2 } from 'lucide-react'
 import axios from 'axios'
+import useRoadmapStream from '../hooks/useRoadmapStream'
 
 const BACKEND_URL = 'http://localhost:8000'
 
@@ -16,6 +17,25 @@ export default function Calendar({ userId, isOpen, onClose }) {
     }
   }, [isOpen, userId, currentDate])
 
+  // Live updates while open: tick off days in place, refetch on structural changes
+  useRoadmapStream(isOpen ? userId : null, {
+    progress: (delta) => {
+      setEvents(prev => prev.map(event =>
+        event.type === 'task' &&
+        event.roadmap_id === delta.roadmap_id &&
+        event.tech_stack === delta.tech_stack &&
+        event.roadmap_day === delta.day
+          ? { ...event, completed: delta.completed }
+          : event
+      ))
+    },
+    roadmap_created: () => fetchCalendarEvents(),
+    roadmap_deleted: (delta) => {
+      setEvents(prev => prev.filter(event => event.roadmap_id !== delta.roadmap_id))
+    },
+    resync: () => fetchCalendarEvents()
+  })
+
   const fetchCalendarEvents = async () => {
     setLoading(true)
     try {
@@ -0,0 +1,27 @@
+import { useEffect, useRef } from 'react'
+
+const BACKEND_URL = 'http://localhost:8000'
+
+const STREAM_EVENTS = ['progress', 'roadmap_created', 'roadmap_deleted', 'resync']
+
+// Subscribes to the user's live roadmap updates (Server-Sent Events).
+// `handlers` maps an event name to a function receiving its parsed delta;
+// EventSource reconnects on its own and resumes from the last event seen.
+export default function useRoadmapStream(userId, handlers) {
+  const handlersRef = useRef(handlers)
+  handlersRef.current = handlers
+
+  useEffect(() => {
+    if (!userId || typeof EventSource === 'undefined') return
+
+    const source = new EventSource(`${BACKEND_URL}/api/roadmap/stream/${userId}`)
+    STREAM_EVENTS.forEach(type => {
+      source.addEventListener(type, (event) => {
+        const handler = handlersRef.current?.[type]
+        if (handler) handler(JSON.parse(event.data))
+      })
+    })
+
+    return () => source.close()
+  }, [userId])
+}
@@ -7,6 +7,7 @@ import Sidebar from '../components/Sidebar'
 import Header from '../components/Header'
 import toast from 'react-hot-toast'
 import axios from 'axios'
+import useRoadmapStream from '../hooks/useRoadmapStream'
 
 const BACKEND_URL = 'http://localhost:8000'
 
@@ -42,6 +43,28 @@ export default function Dashboard() {
     }
   }
 
+  // Progress made in another tab or device shows up without a refresh
+  useRoadmapStream(user?.id, {
+    progress: (delta) => {
+      setActiveRoadmap(prev => {
+        if (!prev || prev.id !== delta.roadmap_id) return prev
+        const progress = prev.progress || {}
+        return {
+          ...prev,
+          progress: {
+            ...progress,
+            [delta.tech_stack]: { ...progress[delta.tech_stack], [delta.day]: delta.completed }
+          }
+        }
+      })
+    },
+    roadmap_created: () => fetchActiveRoadmap(),
+    roadmap_deleted: (delta) => {
+      setActiveRoadmap(prev => (prev && prev.id === delta.roadmap_id ? null : prev))
+    },
+    resync: () => fetchActiveRoadmap()
+  })
+
   const fetchActiveRoadmap = async () => {
     if (!user) return
     
@@ -7,6 +7,7 @@ import Header from '../components/Header'
 import toast from 'react-hot-toast'
 import axios from 'axios'
 import { supabase } from '../lib/supabase'
+import useRoadmapStream from '../hooks/useRoadmapStream'
 
 const BACKEND_URL = 'http://localhost:8000'
 
@@ -42,6 +43,29 @@ export default function LearningRoadmap() {
     }
   }, [user, location])
 
+  // Apply progress made elsewhere (another tab, the calendar) as it happens
+  useRoadmapStream(user?.id, {
+    progress: (delta) => {
+      if (delta.roadmap_id !== generatedRoadmap?.roadmap_id) return
+      setRoadmapProgress(prev => ({
+        ...prev,
+        [delta.tech_stack]: {
+          ...prev[delta.tech_stack],
+          [delta.day]: delta.completed
+        }
+      }))
+    },
+    roadmap_deleted: (delta) => {
+      if (delta.roadmap_id !== generatedRoadmap?.roadmap_id) return
+      setGeneratedRoadmap(null)
+      setRoadmapProgress({})
+      setHasExistingRoadmap(false)
+      setShowChoice(false)
+      setStep(1)
+    },
+    resync: () => loadProgress()
+  })
+
   const checkExistingRoadmap = async () => {
     if (!user) return
     